@@ -1,7 +1,7 @@
 __author__ = """Alan Ramponi, Camilla Casula, Stefano Menini"""
 __version__ = """0.1.0"""
 
-from .inspector import Inspector, InspectorArgs
+from .inspector import Inspector, InspectorArgs, inspect_batch
 from .visualizer import Visualizer, VisualizerArgs
 
 def get_version(
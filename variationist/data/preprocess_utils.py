@@ -1,9 +1,11 @@
+import heapq
 import itertools
 import os
 import pandas as pd
 import re
 import stopwordsiso as stopwords
 import sys
+from collections import Counter
 from tqdm import tqdm
 
 from variationist import utils
@@ -148,6 +150,104 @@ def create_tokenized_ngrams_column(tokenized_text_column, n_tokens):
     return tokenized_text_column
 
 
+def prune_vocabulary(tokenized_columns_dict, min_count=None, max_vocab=None, unk_token=None):
+    """
+    Prunes rare tokens from the vocabulary of already tokenized text columns. Token counts 
+    are computed over all the given columns, then tokens occurring less than `min_count` times 
+    and those not among the `max_vocab` most frequent ones are either dropped or replaced by 
+    `unk_token` (if defined).
+    
+    Parameters
+    ----------
+    tokenized_columns_dict: Dict
+        A dictionary containing the tokenized pandas Series (values) for each text column (keys).
+    min_count: int, *optional*
+        The minimum number of occurrences of a token to be kept in the vocabulary.
+    max_vocab: int, *optional*
+        The maximum number of (most frequent) tokens to be kept in the vocabulary.
+    unk_token: str, *optional*
+        The token that replaces pruned tokens. If None, pruned tokens are dropped.
+        
+    Returns
+    -------
+    pruned_columns_dict: Dict
+        The same dictionary as input, but with pruned tokenized texts.
+    pruned_counts_dict: Dict
+        A dictionary containing a pandas Series with the number of pruned tokens in each text 
+        for each text column.
+    pruning_summary: Dict
+        A dictionary summarizing the pruning that has been carried out.
+    """
+
+    token_counter = Counter()
+    for tokenized_column in tokenized_columns_dict.values():
+        for tokens in tokenized_column:
+            token_counter.update(tokens)
+
+    kept_counts = token_counter.items()
+    if min_count is not None:
+        kept_counts = [(token, count) for token, count in kept_counts if count >= min_count]
+    if max_vocab is not None:
+        kept_counts = heapq.nlargest(max_vocab, kept_counts, key=lambda x:x[1])
+    vocabulary = set(token for token, _ in kept_counts)
+
+    if unk_token is None:
+        prune_fn = lambda tokens: [token for token in tokens if token in vocabulary]
+    else:
+        prune_fn = lambda tokens: [token if token in vocabulary else unk_token for token in tokens]
+
+    pruned_columns_dict, pruned_counts_dict = {}, {}
+    for text_column, tokenized_column in tokenized_columns_dict.items():
+        pruned_columns_dict[text_column] = tokenized_column.apply(prune_fn)
+        pruned_counts_dict[text_column] = tokenized_column.apply(
+            lambda tokens: sum(1 for token in tokens if token not in vocabulary))
+
+    num_pruned_tokens = sum(count for token, count in token_counter.items() if token not in vocabulary)
+    pruning_summary = {
+        "min_count": min_count,
+        "max_vocab": max_vocab,
+        "unk_token": unk_token,
+        "vocab_size_before": len(token_counter),
+        "vocab_size_after": len(vocabulary),
+        "num_pruned_types": len(token_counter) - len(vocabulary),
+        "num_pruned_tokens": num_pruned_tokens,
+    }
+    print(f"INFO: The vocabulary has been pruned from {len(token_counter)} to {len(vocabulary)} "
+        f"types, {'replacing' if unk_token is not None else 'dropping'} {num_pruned_tokens} token occurrences.")
+
+    return pruned_columns_dict, pruned_counts_dict, pruning_summary
+
+
+def get_pruned_tokens_per_subset(label_values_dict, pruned_subsets_of_interest):
+    """
+    Returns a dictionary with the number of tokens pruned from the vocabulary in each subset 
+    of interest.
+    
+    Parameters
+    ----------
+    label_values_dict: Dict
+        A dictionary containing all of the possible values each variable can take in the 
+        input dataset.
+    pruned_subsets_of_interest: Dict
+        A dictionary containing a pandas series with the number of pruned tokens of each text 
+        for each subset of interest, built as the subsets of tokenized texts (i.e., from the 
+        same rows) but from the columns of pruned counts.
+        
+    Returns
+    -------
+    pruned_dict: Dict
+        A dictionary containing the number of pruned tokens in each subset.
+    """
+
+    pruned_dict = {}
+    for column in label_values_dict:
+        for l in range(len(label_values_dict[column])):
+            pruned_subset = pruned_subsets_of_interest[column][l]
+            pruned_dict[pruned_subset.name] = int(pruned_subset.sum())
+
+    return pruned_dict
+
+
 # @TODO this will be developed in a future release
 # def discretize_granularity(dataframe, var_names, var_types, var_semantics, var_granularity):
 #     for i in range(len(var_names)):
@@ -186,6 +286,37 @@ def discretize_bins_col(dataframe_var_col, curr_var_bins):
     return discretized_var_col
 
 
+def get_time_buckets(dataframe_time_col, window_step):
+    """
+    A function that splits a temporal variable into consecutive time buckets of the 
+    same duration, starting from its earliest value. Used for rolling window analyses.
+    
+    Parameters
+    ----------
+    dataframe_time_col: pandas.Series
+        A pandas Series, corresponding to the pandas Dataframe column containing the 
+        temporal variable.
+    window_step: str
+        The duration of each time bucket, as a pandas Timedelta string (e.g., "1D").
+    
+    Returns
+    -------
+    bucket_ids: pandas.Series
+        A Series with the same index as the input one, containing the (integer) time 
+        bucket each value falls into.
+    bucket_starts: List
+        The list of start times (pandas Timestamp) of each time bucket.
+    """
+
+    time_col = pd.to_datetime(dataframe_time_col)
+    step = pd.Timedelta(window_step)
+    start_time = time_col.min()
+    bucket_ids = ((time_col - start_time) // step).astype(int)
+    bucket_starts = [start_time + i * step for i in range(int(bucket_ids.max()) + 1)]
+
+    return bucket_ids, bucket_starts
+
+
 def extract_combinations(token_list, n_items, context_window, unique_cooc):
     """A Function that will extract co-occurrences from tokens if this was set by 
     the user. Used to extract co-occurrences at the text level.
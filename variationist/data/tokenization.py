@@ -34,6 +34,8 @@ class Tokenizer:
         else:
             sys.exit(f"The selected tokenizer ({self.args.tokenizer}) does not match any of the available options. If you intend to use a pretrained tokenizer from HuggingFace, please use the format 'hf::TOKENIZER_NAME'. Other available options are 'whitespace', and a callable function.")
         # TODO add the possibility to add a custom tokenizer as a function in inspectorargs.
+        self.pruned_col_dict = None
+        self.pruning_summary = None
     
     
     def tokenize_column(self, 
@@ -77,7 +79,7 @@ class Tokenizer:
     
 
     def tokenize(self, dataframe):
-        """A wrapper function to tokenize each text column and add it to the original input dataframe as 'tok_ORIGINAL_TEXT_COL_NAME'. Returns the dataframe with the added tokenized columns.
+        """A wrapper function to tokenize each text column and add it to the original input dataframe as 'tok_ORIGINAL_TEXT_COL_NAME'. If `min_count` or `max_vocab` are set, rare tokens are then pruned from the vocabulary of all text columns, and the number of pruned tokens of each text is added as 'pruned_ORIGINAL_TEXT_COL_NAME'. Returns the dataframe with the added tokenized columns.
         
         Parameters
         ----------
@@ -95,6 +97,22 @@ class Tokenizer:
             tokenized_col_dict[text_col] = f"tok_{text_col}"
             dataframe[tokenized_col_dict[text_col]] = self.tokenize_column(
                 dataframe[[str(text_col)]])
+
+        # Prune rare tokens over all the text columns, if requested
+        if (self.args.min_count is not None) or (self.args.max_vocab is not None):
+            print("INFO: Pruning the vocabulary...")
+            pruned_columns_dict, pruned_counts_dict, self.pruning_summary = preprocess_utils.prune_vocabulary(
+                {text_col: dataframe[tok_col] for text_col, tok_col in tokenized_col_dict.items()},
+                self.args.min_count, self.args.max_vocab, self.args.unk_token)
+            self.pruned_col_dict = {}
+            for text_col, pruned_column in pruned_columns_dict.items():
+                dataframe[tokenized_col_dict[text_col]] = pruned_column
+                # Pruned counts are aligned to texts by position (the index may not be unique)
+                self.pruned_col_dict[text_col] = f"pruned_{text_col}"
+                dataframe[self.pruned_col_dict[text_col]] = pruned_counts_dict[text_col].values
+        else:
+            self.pruned_col_dict = None
+
         self.tokenized_col_dict = tokenized_col_dict
         return dataframe
     
@@ -1,3 +1,4 @@
+import functools
 import pandas as pd
 import os
 import re
@@ -11,6 +12,42 @@ from variationist import utils
 from variationist import inspector
 
 
+# Maximum number of HuggingFace tokenizers kept loaded at the same time in the process
+HF_TOKENIZERS_CACHE_SIZE = 8
+
+
+@functools.lru_cache(maxsize=HF_TOKENIZERS_CACHE_SIZE)
+def load_hf_tokenizer(tokenizer_name: str, 
+                      additional_special_tokens: tuple = ()):
+    """Loads a pretrained HuggingFace tokenizer and adds the given special tokens to its vocabulary.
+    Ready-to-use tokenizers are kept in a process-wide LRU cache keyed by name and added tokens, so
+    that repeated analyses do not pay the loading and vocabulary augmentation costs every time. The
+    returned tokenizer is shared, therefore it should not be modified by the caller.
+    
+    Parameters
+    ----------
+    tokenizer_name: str
+        The name of the pretrained tokenizer on HuggingFace (e.g., "bert-base-uncased").
+    additional_special_tokens: tuple
+        The special tokens to be added to the tokenizer's vocabulary. Defaults to no tokens.
+    
+    Returns
+    -------
+    hf_tokenizer: transformers.PreTrainedTokenizerBase
+        The loaded tokenizer.
+    """
+    hf_tokenizer = AutoTokenizer.from_pretrained(tokenizer_name, use_fast=True)
+    if len(additional_special_tokens) > 0:
+        hf_tokenizer.add_special_tokens(
+            {'additional_special_tokens': list(additional_special_tokens)})
+    return hf_tokenizer
+
+
+def clear_hf_tokenizers_cache():
+    """Removes all the loaded HuggingFace tokenizers from the process-wide cache."""
+    load_hf_tokenizer.cache_clear()
+
+
 def whitespace_tokenization(text_column: pd.Series, 
                             args):
     """Takes as input an array/series of texts and tokenizes it, returns same array/series but tokenized splitting on whitespace.
@@ -57,8 +94,8 @@ def huggingface_tokenization(text_column: pd.Series,
     tok_column:: pandas.Series
         A pandas Series containing the initial texts but tokenized.
     """
-    tokenizer_name = args.tokenizer.strip("hf::")
-    hf_tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+    tokenizer_name = args.tokenizer[len("hf::"):]
+    hf_tokenizer = load_hf_tokenizer(tokenizer_name)
     tqdm.pandas()
     nulls = text_column.isnull()
     if nulls.values.any():
@@ -1,18 +1,30 @@
 """
 The Inspector class, to handle all the operations of Variationist.
 """
+import concurrent.futures
+import itertools
 import json
 import os
 import pandas as pd
+import pickle
 import sys
-from dataclasses import dataclass, asdict, field
+from dataclasses import dataclass, asdict, field, replace
 from datasets import Dataset
 from typing import Callable, List, Optional, Tuple, Union, Dict
 
 from variationist import utils
+from variationist.results_cache import APPROX_ERRORS_SUFFIX, ResultsCache, get_args_fingerprint, get_dataset_fingerprint
 from variationist.data import preprocess_utils
 from variationist.data.tokenization import Tokenizer
-from variationist.metrics import metrics
+from variationist.metrics import metrics, shared_metrics
+from variationist.metrics.subset_counts import SubsetCounts
+
+
+# Arguments each stage of the analysis depends on (see `Inspector.get_stage_key`)
+TOKENIZATION_ARGS = ["text_names", "tokenizer", "language", "n_tokens", "n_cooc", "unique_cooc", 
+    "cooc_window_size", "stopwords", "custom_stopwords", "lowercase", "min_count", "max_vocab", "unk_token"]
+SUBSETS_ARGS = TOKENIZATION_ARGS + ["var_names", "var_types", "var_semantics", "var_subsets", 
+    "var_bins", "ignore_null_var"]
 
 
 @dataclass
@@ -61,14 +73,36 @@ class InspectorArgs:
             Size of the context window for co-occurrences. For instance, a `cooc_window_size` of 3 means we use a context window of 3 to calculate co-occurrences, meaning that any token that is within 3 tokens before or after a given token is added as a co-occurrence.
         freq_cutoff: Int
             The token frequency, expressed as an integer, below which we do not consider the token in the analysis of pmi-based metrics. Defaults to 3.
+        approx_counters: Int, *optional*, defaults to `None`
+            The maximum number of distinct tokens counted for each subset by `freq` and pmi-based metrics. If set, token frequencies are approximated using the SpaceSaving algorithm with a fixed amount of memory per subset: only the most frequent tokens (heavy hitters) are kept, and their frequencies overestimate the true ones by at most N/`approx_counters` (where N is the number of tokens in the subset; the actual maximum error of each subset is recorded for each metric in the `approx_errors` field of the output metadata). Useful for huge vocabularies (e.g., with high `n_tokens` or co-occurrences). Defaults to None (exact counting).
+        top_k: Int, *optional*, defaults to `None`
+            The maximum number of highest scoring tokens to keep for each subset in the output of `freq` and pmi-based metrics. Tokens are selected without sorting the whole vocabulary, and only the retained ones are stored in the output. Defaults to None (all tokens are kept).
+        min_score: Float, *optional*, defaults to `None`
+            The minimum value (e.g., frequency or pmi-based score) a token should have to be kept in the output of `freq` and pmi-based metrics. Defaults to None (all tokens are kept).
         stopwords: Bool
             Whether to remove stopwords from texts before tokenization or not (using default lists in a given `language`). Will default to False.
         custom_stopwords: `str` or `List`, *optional*, defaults to `None`
             A list of stopwords (or a path to a file containing stopwords, one per line) to be removed before tokenization. If `stopwords` is True, these stopwords will be added to that list. Will default to None.
         lowercase: Bool
             Whether to lowercase all the texts before tokenization or not. Will default to False.
+        min_count: Int, *optional*, defaults to `None`
+            The minimum number of occurrences (over all text columns) of a token for it to be kept in the vocabulary. Tokens are pruned right after tokenization (thus on n-grams or co-occurrences, if used), so that all metrics work on a bounded vocabulary. The pruning is reported in the metadata and, if `stats` is computed, as the number of pruned tokens for each subset. Defaults to None (no pruning).
+        max_vocab: Int, *optional*, defaults to `None`
+            The maximum number of most frequent tokens (over all text columns) to be kept in the vocabulary. Can be combined with `min_count`. Defaults to None (no pruning).
+        unk_token: str, *optional*, defaults to `None`
+            The token replacing the tokens pruned through `min_count` or `max_vocab` (e.g., "<UNK>"). Defaults to None, meaning pruned tokens are dropped.
         ignore_null_var: Bool
             Whether to proceed when null values are present for variables. Defaults to False, as this behavior can have unpredictable results. Set to True to treat "Nan" as any other variable value.
+        n_jobs: Int
+            The number of metrics to compute in parallel. Defaults to 1 (metrics are computed one after the other). If set to a value lower than or equal to 0, all the available CPUs are used. Metrics are independent of each other and are all computed over the same (read-only) subsets, and their results are stored in the order they were requested.
+        subset_n_jobs: Int
+            The number of workers used to split the per-subset computation inside each built-in metric (e.g., for variables with many values or intersections of variables). Defaults to 1 (subsets are processed one after the other). If set to a value lower than or equal to 0, all the available CPUs are used. Subsets are grouped into chunks of similar size, and results are merged following the order of subsets. Note that setting both `n_jobs` and `subset_n_jobs` may oversubscribe the available CPUs.
+        executor: str
+            The kind of workers used when `n_jobs` or `subset_n_jobs` is not 1. Available choices are `threads` (default) and `processes`. Processes avoid contention on the Python interpreter lock for pure-Python metrics, but require data and custom metric functions to be picklable (e.g., no lambdas).
+        cache_dir: str, *optional*, defaults to `None`
+            The path to a folder used as an on-disk cache for the results of built-in metrics. If set, results are cached at the metric level, keyed by a fingerprint of the text and variable columns of the dataset and by the analysis arguments (excluding those that do not affect results, such as `metrics` and `n_jobs`). Metrics which are already in the cache are then loaded instead of being computed again, and tokenization is skipped entirely if all the requested metrics are cached (and no vocabulary pruning is requested). Custom metrics, as well as results obtained with a custom tokenizer function, are never cached. Defaults to None (no caching).
+        cache_max_size: Int, *optional*, defaults to `None`
+            The maximum size of the cache folder in megabytes. When exceeded, the least recently used entries are evicted. Defaults to None (no limit).
     """
     
     text_names: Optional[List] = None # explicit column name(s)
@@ -85,10 +119,21 @@ class InspectorArgs:
     unique_cooc: Optional[bool] = False
     cooc_window_size: Optional[int] = 0
     freq_cutoff: Optional[int] = 3
+    approx_counters: Optional[int] = None
+    top_k: Optional[int] = None
+    min_score: Optional[float] = None
     stopwords: Optional[bool] = False
     custom_stopwords: Optional[Union[str, list]] = None
     lowercase: Optional[bool] = False
+    min_count: Optional[int] = None
+    max_vocab: Optional[int] = None
+    unk_token: Optional[str] = None
     ignore_null_var: Optional[bool] = False
+    n_jobs: Optional[int] = 1
+    subset_n_jobs: Optional[int] = 1
+    executor: Optional[str] = "threads" # threads (default), processes
+    cache_dir: Optional[str] = None
+    cache_max_size: Optional[int] = None # in megabytes
     
 
     def check_values(self):
@@ -101,6 +146,10 @@ class InspectorArgs:
         if self.metrics == None:
             print("WARNING: No metrics were defined. Variationist will assume only some basic dataset statistics are needed. Please consult the documentation to read what metrics are natively supported and how to use your own.")
             self.metrics = ["basic-stats"]
+        if self.executor not in ["threads", "processes"]:
+            sys.exit(f"ERROR: The executor '{self.executor}' is not supported. Available choices are 'threads' and 'processes'.")
+        if (self.max_vocab is not None) and (self.max_vocab < 1):
+            sys.exit(f"ERROR: max_vocab should be a positive integer, but {self.max_vocab} was given.")
     
 
     def to_dict(self):
@@ -145,8 +194,52 @@ class Inspector:
         """"""
         
         self.dataset = dataset
-        self.args = args
 
+        # Outputs of the stages of the analysis, which are kept across repeated analyses
+        self.stage_keys = dict()
+        self.stage_tokenizers = dict()
+        self.subsets_stage = None
+        self.var_label_values_dict = None
+        self.pruned_subsets_of_interest = None
+        self.counts_stage = None
+        self.merged_counts = None
+        self.metric_results = dict()
+        self.approx_errors = dict()
+        self.long_form_dfs = dict()
+        self.dataset_fingerprint = None
+
+        self.metadata_dict = {"dataset": self.dataset}
+        self.set_args(args)
+        
+        if type(self.dataset) is Dataset:
+            self.dataframe = pd.DataFrame(self.dataset)
+            self.metadata_dict["dataset"] = self.dataset.info.dataset_name
+        elif type(self.dataset) is pd.DataFrame:
+            try:
+                self.metadata_dict["dataset"] = self.dataset.name
+            except:
+                self.metadata_dict["dataset"] = "Custom_User_DataFrame"
+            self.dataframe = self.dataset
+            pass
+        elif type(self.dataset) is str:
+            self.dataframe = utils.convert_file_to_dataframe(self.dataset, cols_type=self.cols_type)
+        else:
+            sys.exit(f"The specified dataset is not one of the accepted ones (string, a pandas DataFrame or a Huggingface Dataset), but a type {type(self.dataset)} instead.")
+            
+        
+        # Instantiate the tokenizer
+        self.tokenizer = Tokenizer(self.args)
+        
+        self.check_columns()
+        self.check_nan_values()
+        self.check_discretize()
+
+
+    def set_args(self, args):
+        """Sets the arguments of the analysis, checking them and setting defaults for 
+        undefined variable types, semantics, and bins."""
+
+        self.args = args
         args.check_values()
         
         # Set defaults for variable types and semantics in case they are not defined
@@ -167,7 +260,7 @@ class Inspector:
         metadata_dict = self.args.to_dict()
         print("INFO: The metadata we will be using for the current analysis are:")
         print(metadata_dict)
-        metadata_dict["dataset"] = self.dataset 
+        metadata_dict["dataset"] = self.metadata_dict["dataset"]
         self.metadata_dict = metadata_dict
         
         # Check if variable definitions match in length
@@ -188,36 +281,67 @@ class Inspector:
                             "Please provide all column identifiers as names (as in the header line) or indices.")
         self.cols_type = text_names_type
         print(f"INFO: all column identifiers are treated as column {self.cols_type}.")
-        
-        if type(self.dataset) is Dataset:
-            self.dataframe = pd.DataFrame(self.dataset)
-            self.metadata_dict["dataset"] = self.dataset.info.dataset_name
-        elif type(self.dataset) is pd.DataFrame:
-            try:
-                self.metadata_dict["dataset"] = self.dataset.name
-            except:
-                self.metadata_dict["dataset"] = "Custom_User_DataFrame"
-            self.dataframe = self.dataset
-            pass
-        elif type(self.dataset) is str:
-            self.dataframe = utils.convert_file_to_dataframe(self.dataset, cols_type=self.cols_type)
-        else:
-            sys.exit(f"The specified dataset is not one of the accepted ones (string, a pandas DataFrame or a Huggingface Dataset), but a type {type(self.dataset)} instead.")
-            
-        
+
         # Create a dictionary containing the specified column strings (values) for texts and labels (keys)
         self.col_names_dict = {
             utils.TEXT_COLS_KEY: args.text_names,
             utils.LABEL_COLS_KEY: args.var_names
         }
 
-        # Instantiate the tokenizer
-        self.tokenizer = Tokenizer(self.args)
-        
+        # Instantiate the results cache, if requested
+        self.results_cache = None
+        if self.args.cache_dir is not None:
+            self.results_cache = ResultsCache(self.args.cache_dir, self.args.cache_max_size)
+
+
+    def update_args(self, **kwargs):
+        """Updates the arguments of the analysis, given as keyword arguments (e.g., 
+        `metrics=["pmi"]`). The outputs of the stages of previous analyses (i.e., tokenized 
+        texts, subsets of interest, shared counts, and metric results) are kept, so that a 
+        further call to `inspect()` only redoes the stages affected by the changes. If 
+        `var_names` is updated but `var_types`, `var_semantics`, or `var_bins` are not, the 
+        latter are reset to their defaults."""
+
+        for arg_name in kwargs:
+            if not hasattr(self.args, arg_name):
+                sys.exit(f"ERROR: '{arg_name}' is not an argument of InspectorArgs.")
+        if "var_names" in kwargs:
+            for arg_name in ["var_types", "var_semantics", "var_bins"]:
+                kwargs.setdefault(arg_name, None)
+
+        self.set_args(replace(self.args, **kwargs))
         self.check_columns()
         self.check_nan_values()
-        
-        # Check if we need to bin or discretize any values
+        self.check_discretize()
+        self.dataset_fingerprint = None
+
+
+    def get_args_key_dict(self):
+        """Returns the InspectorArgs values inside a dictionary identifying the outputs of the 
+        analysis. Unlike `to_dict()`, a custom tokenizer function is identified by the function 
+        itself rather than by its name (which may be shared, e.g., by lambdas); a reference to it 
+        is kept, so that its identity cannot be reused by another function."""
+
+        args_dict = self.args.to_dict()
+        if callable(self.args.tokenizer):
+            self.stage_tokenizers[id(self.args.tokenizer)] = self.args.tokenizer
+            args_dict["tokenizer"] = f"{args_dict['tokenizer']}@{id(self.args.tokenizer)}"
+
+        return args_dict
+
+
+    def get_stage_key(self, arg_names):
+        """Returns a key identifying the output of a stage of the analysis, given the names of 
+        the arguments it depends on."""
+
+        args_dict = self.get_args_key_dict()
+        return json.dumps({arg_name: args_dict[arg_name] for arg_name in arg_names}, 
+            sort_keys=True, default=str)
+
+
+    def check_discretize(self):
+        """Checks if we need to bin or discretize any values."""
+
         self.discretize = False
         for i in range(len(self.args.var_names)):
             if self.args.var_bins[i] != 0:
@@ -249,8 +373,10 @@ class Inspector:
             
     def handle_bins_and_granularity(self):
         """For each variable that requires binning, checks that it can be carried out and calls 
-        the dedicated function."""
+        the dedicated function. Binned variables are stored in a shallow copy of the dataframe, 
+        which is returned, so that original values are kept for further analyses."""
 
+        binned_dataframe = self.dataframe.copy(deep=False)
         for i in range(len(self.args.var_names)):
             curr_var_name = self.args.var_names[i]
             curr_bins = self.args.var_bins[i]
@@ -265,7 +391,7 @@ class Inspector:
                         if curr_sem == "temporal":
                             curr_var_column = pd.to_datetime(curr_var_column)
                         print(f"INFO: For the variable {curr_var_name}, bins were defined. It will therefore be split into {curr_bins} equal bins.")
-                        self.dataframe[curr_var_name] = preprocess_utils.discretize_bins_col(
+                        binned_dataframe[curr_var_name] = preprocess_utils.discretize_bins_col(
                             curr_var_column, curr_bins
                         )
                     else:
@@ -273,57 +399,209 @@ class Inspector:
                 else:
                     sys.exit(f"ERROR: var_bins was defined for variable {curr_var_name}, whose type is 'nominal'. However, nominal values cannot be divided into bins. If the {curr_var_name} variable is numeric, please specify another var_type for it. If it is an actual nominal variable, its var_bins value should be 0.")
 
+        return binned_dataframe
+
 
     def preprocess(self):
         """Performs all of the preprocessing operations of Variationist, such as grouping 
         together variables and dividing variables into bins."""
 
         # Check if any discretization or binning should be carried out and do it
+        dataframe = self.dataframe
         if self.discretize == True:
-            self.handle_bins_and_granularity()
+            dataframe = self.handle_bins_and_granularity()
         
-        label_values_dict = preprocess_utils.get_label_values(self.dataframe, self.col_names_dict)
+        label_values_dict = preprocess_utils.get_label_values(dataframe, self.col_names_dict)
+        # The label values of each variable are kept to rebuild intersections (see `append()`)
+        self.var_label_values_dict = label_values_dict
         if len(self.args.var_names) == 1 and  len(self.args.text_names) == 1:
-            subsets_of_interest = preprocess_utils.get_subset_dict(self.dataframe,
-                                                    self.tokenizer.tokenized_col_dict,
-                                                    label_values_dict)
+            get_subsets_fn = preprocess_utils.get_subset_dict
         else:        
             # if we have more than two variables, we are interested in the intersections between them
-            subsets_of_interest = preprocess_utils.get_subset_intersections(self.dataframe,
-                                                    self.tokenizer.tokenized_col_dict,
-                                                    label_values_dict)
+            get_subsets_fn = preprocess_utils.get_subset_intersections
+        subsets_of_interest = get_subsets_fn(dataframe, self.tokenizer.tokenized_col_dict, label_values_dict)
+
+        # The numbers of pruned tokens (if any) are split into subsets from the same rows as texts
+        self.pruned_subsets_of_interest = None
+        if self.tokenizer.pruned_col_dict is not None:
+            self.pruned_subsets_of_interest = get_subsets_fn(dataframe, self.tokenizer.pruned_col_dict, 
+                label_values_dict)
+
+        if get_subsets_fn == preprocess_utils.get_subset_intersections:
             label_values_dict = preprocess_utils.update_label_values_dict_with_inters(
                 label_values_dict, self.args.text_names)
         
         return label_values_dict, subsets_of_interest
 
 
-    def compute(self):
+    def get_cached_results(self):
+        """Returns a dictionary with the results of the requested metrics (keys) which are 
+        already in the results cache (if any)."""
+
+        cached_results = dict()
+
+        # Results of previous analyses by this Inspector are valid as long as the arguments are unchanged
+        args_fingerprint = get_args_fingerprint(self.get_args_key_dict())
+        if self.stage_keys.get("metrics") != args_fingerprint:
+            self.metric_results = dict()
+            self.approx_errors = dict()
+            self.stage_keys["metrics"] = args_fingerprint
+        for metric in self.args.metrics:
+            if (type(metric) is str) and (metric in self.metric_results):
+                cached_results[metric] = self.metric_results[metric]
+        if len(cached_results) > 0:
+            print(f"INFO: Reusing the results of {list(cached_results.keys())} from the previous analysis.")
+
+        # Results computed with a custom tokenizer are never cached on disk, since its 
+        # implementation may change (while it is only identified by its name)
+        if (self.results_cache is None) or callable(self.args.tokenizer):
+            return cached_results
+
+        if self.dataset_fingerprint is None:
+            self.dataset_fingerprint = get_dataset_fingerprint(
+                self.dataframe, list(self.args.text_names) + list(self.args.var_names))
+        disk_cached_metrics = []
+        for metric in self.args.metrics:
+            # Custom metrics are never cached, since their implementation may change
+            if (type(metric) is not str) or (metric in cached_results):
+                continue
+            metric_result = self.results_cache.get(self.dataset_fingerprint, args_fingerprint, metric)
+            if metric_result is not None:
+                cached_results[metric] = metric_result
+                disk_cached_metrics.append(metric)
+                if self.args.approx_counters is not None:
+                    approx_errors = self.results_cache.get(self.dataset_fingerprint, args_fingerprint, 
+                        metric + APPROX_ERRORS_SUFFIX)
+                    if approx_errors is not None:
+                        self.approx_errors[metric] = approx_errors
+        if len(disk_cached_metrics) > 0:
+            print(f"INFO: Loaded the results of {disk_cached_metrics} from the cache.")
+
+        return cached_results
+
+
+    def cache_results(self, results_dict, computed_metrics):
+        """Stores the results of the given (built-in) metrics from results_dict (and the errors of 
+        their approximate frequencies, if any) for further analyses by this Inspector and in the 
+        results cache (if any)."""
+
+        for metric in computed_metrics:
+            if type(metric) is str:
+                self.metric_results[metric] = results_dict[metric]
+
+        if (self.results_cache is None) or callable(self.args.tokenizer):
+            return
+
+        args_fingerprint = self.stage_keys["metrics"]
+        for metric in computed_metrics:
+            if type(metric) is str:
+                self.results_cache.put(self.dataset_fingerprint, args_fingerprint, metric, 
+                    results_dict[metric])
+                if metric in self.approx_errors:
+                    self.results_cache.put(self.dataset_fingerprint, args_fingerprint, 
+                        metric + APPROX_ERRORS_SUFFIX, self.approx_errors[metric])
+
+
+    def invalidate_cache(self, metrics=None):
+        """Removes the cached results for the current dataset from the results cache. If 
+        `metrics` (a list of metric names) is set, only the results of those metrics are 
+        removed."""
+
+        if self.results_cache is None:
+            print("WARNING: No cache_dir was set, thus there is no cache to invalidate.")
+            return
+
+        if self.dataset_fingerprint is None:
+            self.dataset_fingerprint = get_dataset_fingerprint(
+                self.dataframe, list(self.args.text_names) + list(self.args.var_names))
+        self.results_cache.invalidate(self.dataset_fingerprint, metrics)
+
+
+    def compute(self, cached_results=None):
         """Main function carrying out the entire analysis pipeline. It creates a results dict 
-        with the calculated metrics."""
+        with the calculated metrics. Metrics whose results are in cached_results (if any) 
+        are not calculated again."""
+
+        if cached_results is None:
+            cached_results = dict()
+        metrics_to_compute = [metric for metric in self.args.metrics if not (
+            (type(metric) is str) and (metric in cached_results))]
+
+        label_values_dict, subsets_of_interest = self.get_subsets_of_interest()
+        results_dict, approx_errors = self.calculate_metrics(metrics_to_compute, label_values_dict, subsets_of_interest)
+        self.approx_errors.update(approx_errors)
+            
+        # Report the number of tokens pruned from the vocabulary in each subset (if any) as a statistic
+        if ("stats" in results_dict) and (self.pruned_subsets_of_interest is not None):
+            results_dict["stats"]["num_pruned_tokens"] = {
+                list(label_values_dict.keys())[0]: preprocess_utils.get_pruned_tokens_per_subset(
+                    label_values_dict, self.pruned_subsets_of_interest)
+            }
+
+        self.cache_results(results_dict, metrics_to_compute)
+
+        # Merge computed and cached results following the order in which metrics were requested
+        results_dict.update(cached_results)
+        metric_names = [metric if type(metric) is str else metric.__name__ for metric in self.args.metrics]
+        results_dict = {metric_name: results_dict[metric_name] for metric_name in metric_names}
+        self.results_dict = results_dict
+
+        return subsets_of_interest, results_dict
 
-        label_values_dict, subsets_of_interest = self.preprocess()
+
+    def get_subsets_of_interest(self):
+        """Returns the label values and the subsets of interest. These are only built again if 
+        the arguments they depend on have changed since the previous analysis."""
+
+        subsets_key = self.get_stage_key(SUBSETS_ARGS)
+        if self.stage_keys.get("subsets") != subsets_key:
+            self.subsets_stage = self.preprocess()
+            self.stage_keys["subsets"] = subsets_key
+        else:
+            print("INFO: Reusing the subsets of interest from the previous analysis.")
+
+        return self.subsets_stage
+
+
+    def calculate_metrics(self, metrics_to_compute, label_values_dict, subsets_of_interest):
+        """Calculates the given metrics over the subsets of interest and returns a results dict 
+        with their results, along with a dict with the maximum error on the token frequencies of 
+        each subset for the metrics which approximated them (see `approx_counters`)."""
+
+        # Metrics are independent of each other, so they can be computed in parallel if requested
+        n_workers = min(utils.get_num_workers(self.args.n_jobs), len(metrics_to_compute))
+        if n_workers > 1:
+            print(f"INFO: Calculating {len(metrics_to_compute)} metrics in parallel using {n_workers} {self.args.executor}.")
+            if self.args.executor == "processes":
+                executor_class = concurrent.futures.ProcessPoolExecutor
+            else:
+                executor_class = concurrent.futures.ThreadPoolExecutor
+            with executor_class(max_workers=n_workers) as executor:
+                futures = [executor.submit(metrics.calculate_metric, metric, self.args,
+                    label_values_dict, subsets_of_interest) for metric in metrics_to_compute]
+                metric_results = [future.result() for future in futures]
+        else:
+            metric_results = [metrics.calculate_metric(metric, self.args, label_values_dict, 
+                subsets_of_interest) for metric in metrics_to_compute]
         
+        # Store the results following the order in which metrics were requested
         results_dict = dict()
-        for metric in self.args.metrics:
-            current_metric = metrics.Metric(metric, self.args)
+        approx_errors_dict = dict()
+        for metric, (metric_result, approx_errors) in zip(metrics_to_compute, metric_results):
             if type(metric) is not str:
                 metric_name = metric.__name__
             else:
                 metric_name = metric
-            print(f"INFO: Currently calculating metric: '{metric_name}'")
             results_dict[metric_name] = {}
             
             if metric_name == "stats":
-                results_dict[metric_name] = current_metric.calculate_metric(
-                    label_values_dict, subsets_of_interest)
+                results_dict[metric_name] = metric_result
             else:
-                results_dict[metric_name][list(label_values_dict.keys())[0]] = current_metric.calculate_metric(
-                    label_values_dict, subsets_of_interest)
-            
-        self.results_dict = results_dict
+                results_dict[metric_name][list(label_values_dict.keys())[0]] = metric_result
+            if len(approx_errors) > 0:
+                approx_errors_dict[metric_name] = approx_errors
 
-        return subsets_of_interest, results_dict
+        return results_dict, approx_errors_dict
 
     
     def create_output_dict(self):
@@ -336,24 +614,418 @@ class Inspector:
         self.output_dict = output_dict
     
 
+    def tokenize(self):
+        """Tokenizes the text columns of the dataframe. Texts are only tokenized again if the 
+        arguments tokenization depends on have changed since the previous analysis."""
+
+        tokenization_key = self.get_stage_key(TOKENIZATION_ARGS)
+        if self.stage_keys.get("tokenization") == tokenization_key:
+            print("INFO: Reusing the tokenized texts from the previous analysis.")
+            return
+
+        self.tokenizer = Tokenizer(self.args)
+        self.dataframe = self.tokenizer.tokenize(self.dataframe)
+        self.stage_keys["tokenization"] = tokenization_key
+
+
     def inspect(self):
         """Wrapper function for tokenizing, carrying out computation, and saving the output 
-        dictionary, which it returns."""
+        dictionary, which it returns. When called again (e.g., after `update_args()`), only the 
+        stages whose arguments have changed are carried out again."""
 
-        self.dataframe = self.tokenizer.tokenize(self.dataframe)
-        self.compute()
+        cached_results = self.get_cached_results()
+        tokenization_key = self.get_stage_key(TOKENIZATION_ARGS)
+        is_tokenized = (self.stage_keys.get("tokenization") == tokenization_key)
+        requires_pruning = (self.args.min_count is not None) or (self.args.max_vocab is not None)
+
+        # Skip the entire pipeline if all of the requested metrics have been cached
+        if (len(cached_results) == len(self.args.metrics)) and (is_tokenized or not requires_pruning):
+            print("INFO: All of the requested metrics have been loaded from previous analyses or the cache.")
+            self.results_dict = {metric: cached_results[metric] for metric in self.args.metrics}
+        else:
+            self.tokenize()
+            self.compute(cached_results)
+        if (self.stage_keys.get("tokenization") == tokenization_key) and (
+            self.tokenizer.pruning_summary is not None):
+            self.metadata_dict["vocab_pruning"] = self.tokenizer.pruning_summary
+        # Report the maximum error on approximate token frequencies of each subset (if any)
+        approx_errors = {metric: self.approx_errors[metric] for metric in self.results_dict 
+            if metric in self.approx_errors}
+        if len(approx_errors) > 0:
+            self.metadata_dict["approx_errors"] = approx_errors
+        else:
+            self.metadata_dict.pop("approx_errors", None)
         self.create_output_dict()
 
         return self.output_dict
 
 
+    def get_counts_of_interest(self):
+        """Returns the label values of each variable, the label values (i.e., names) of the 
+        subsets of interest, and the counts (SubsetCounts) of each subset of interest, tokenizing 
+        texts and building subsets first if needed."""
+
+        if (self.counts_stage is None) or (self.stage_keys.get("counts") != self.get_stage_key(SUBSETS_ARGS)):
+            self.tokenize()
+            label_values_dict, subsets_of_interest = self.get_subsets_of_interest()
+            print("INFO: Counting the subsets of interest...")
+            self.counts_stage = (self.var_label_values_dict, label_values_dict, 
+                metrics.get_subset_counts(label_values_dict, subsets_of_interest, self.args))
+            self.stage_keys["counts"] = self.get_stage_key(SUBSETS_ARGS)
+
+        return self.counts_stage
+
+
+    def save_counts(self,
+                    output_path = "counts.pkl"
+                    ):
+        """Saves the counts of each subset of interest (merged with previous ones, if `append()` 
+        has been called) to a file, so that the analysis can later be updated with new texts 
+        using `append()` without processing the previous texts again."""
+
+        var_label_values_dict, label_values_dict, counts_of_interest = self.get_counts_of_interest()
+        # Counts merged by `append()` are only valid as long as the current counts are
+        if (self.merged_counts is not None) and (self.merged_counts[0] == self.stage_keys["counts"]):
+            _, var_label_values_dict, label_values_dict, counts_of_interest = self.merged_counts
+        args_dict = self.args.to_dict()
+        counts_dict = {
+            "args": {arg_name: args_dict[arg_name] for arg_name in SUBSETS_ARGS},
+            "var_label_values_dict": var_label_values_dict,
+            "label_values_dict": label_values_dict,
+            "counts_of_interest": counts_of_interest,
+        }
+        with open(output_path, "wb") as output_file:
+            pickle.dump(counts_dict, output_file, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+    def append(self,
+               previous_counts = "counts.pkl"
+               ):
+        """Updates a previous analysis with the texts of the current dataset. Only the current 
+        texts are tokenized and counted: their counts are merged with those saved by a previous 
+        analysis (using `save_counts()`), and metrics are calculated from the merged counts. The 
+        output dictionary is returned, and `save_counts()` can then be used to store the merged 
+        counts for further updates. Previous and current analyses must share the same text and 
+        variable columns and tokenization arguments; only metrics in `COUNTS_METRICS` (i.e., all 
+        built-in metrics except `lex_art`) are supported, and variables cannot be binned.
+
+        Parameters
+        ----------
+        previous_counts: `str` or `dict`
+            A path to the counts saved by a previous analysis, or the loaded counts themselves.
+        """
+
+        for metric in self.args.metrics:
+            if metric not in metrics.COUNTS_METRICS:
+                sys.exit(f"ERROR: The metric '{metric}' cannot be updated with new texts. Supported metrics are {metrics.COUNTS_METRICS}.")
+        if (self.args.min_count is not None) or (self.args.max_vocab is not None):
+            sys.exit("ERROR: Vocabulary pruning (min_count and max_vocab) depends on all texts, thus it is not supported when updating previous analyses.")
+        if self.discretize == True:
+            sys.exit("ERROR: Bins depend on the values of all texts, thus var_bins is not supported when updating previous analyses.")
+
+        if type(previous_counts) is str:
+            with open(previous_counts, "rb") as counts_file:
+                previous_counts = pickle.load(counts_file)
+        args_dict = self.args.to_dict()
+        for arg_name in SUBSETS_ARGS:
+            if previous_counts["args"][arg_name] != args_dict[arg_name]:
+                sys.exit(f"ERROR: The value of '{arg_name}' ({args_dict[arg_name]}) does not match the one of the previous analysis ({previous_counts['args'][arg_name]}).")
+
+        var_label_values_dict, label_values_dict, counts_of_interest = self.get_counts_of_interest()
+        var_label_values_dict, label_values_dict, counts_of_interest = metrics.merge_subset_counts(
+            previous_counts["var_label_values_dict"], previous_counts["label_values_dict"], 
+            previous_counts["counts_of_interest"], var_label_values_dict, label_values_dict, 
+            counts_of_interest, self.args.text_names)
+        # Merged counts are kept apart from the counts of the current texts, so that calling 
+        # `append()` again (e.g., to retry) does not merge the previous counts twice
+        self.merged_counts = (self.stage_keys["counts"], var_label_values_dict, label_values_dict, 
+            counts_of_interest)
+
+        print("INFO: Calculating metrics from the merged counts of previous and current texts.")
+        results_dict, _ = self.calculate_metrics(self.args.metrics, label_values_dict, counts_of_interest)
+        self.results_dict = {metric: results_dict[metric] for metric in self.args.metrics}
+        self.create_output_dict()
+
+        return self.output_dict
+
+
+    def inspect_windows(self,
+                        window_var,
+                        window_size = "30D",
+                        window_step = "1D"
+                        ):
+        """Carries out a rolling window analysis over a temporal variable: metrics are calculated 
+        for each window of `window_size` duration, moving by `window_step` at each step. Texts are 
+        tokenized and counted only once, grouped into consecutive time buckets of `window_step` 
+        duration; counts of each window are then obtained from the previous one by adding the 
+        bucket entering the window and subtracting the one leaving it. Only metrics in 
+        `COUNTS_METRICS` (i.e., all built-in metrics except `lex_art`) are supported.
+
+        Parameters
+        ----------
+        window_var: `str`
+            The name of the column containing the temporal variable. It should not be among 
+            `var_names`, which define the subsets of interest within each window.
+        window_size: `str`
+            The duration of each window, as a pandas Timedelta string (e.g., "30D"). It must be 
+            a multiple of `window_step`.
+        window_step: `str`
+            The duration of each step, as a pandas Timedelta string (e.g., "1D").
+
+        Returns
+        -------
+        windows_dict: `dict`
+            A dictionary with the metadata and a list of windows, each with its start time, 
+            end time (excluded), and calculated metrics.
+        """
+
+        for metric in self.args.metrics:
+            if metric not in metrics.COUNTS_METRICS:
+                sys.exit(f"ERROR: The metric '{metric}' is not supported in rolling window analyses. Supported metrics are {metrics.COUNTS_METRICS}.")
+        if window_var in self.args.var_names:
+            sys.exit(f"ERROR: The window variable '{window_var}' should not be among var_names, which define the subsets of interest within each window.")
+        if window_var not in self.dataframe.columns:
+            sys.exit(f"ERROR: the '{window_var}' column is not present in the dataframe.")
+        if self.dataframe[window_var].isnull().values.any():
+            sys.exit(f"ERROR: One or more null values were found for the '{window_var}' window variable.")
+        n_steps = pd.Timedelta(window_size) / pd.Timedelta(window_step)
+        if (n_steps < 1) or (n_steps != int(n_steps)):
+            sys.exit(f"ERROR: The window size ({window_size}) should be a multiple of the window step ({window_step}).")
+        n_steps = int(n_steps)
+
+        self.tokenize()
+        label_values_dict, subsets_of_interest = self.get_subsets_of_interest()
+        bucket_ids, bucket_starts = preprocess_utils.get_time_buckets(self.dataframe[window_var], window_step)
+        print(f"INFO: Counting the subsets of interest in {len(bucket_starts)} time buckets...")
+        bucket_counts = metrics.get_bucket_counts(label_values_dict, subsets_of_interest, bucket_ids, self.args)
+
+        # Counts of the current window for each subset of interest
+        window_counts = {column: [SubsetCounts(subset.name, metrics.TEXT_STAT_FNS) for subset in 
+            shared_metrics.get_subsets(label_values_dict, subsets_of_interest, column)] 
+            for column in label_values_dict}
+
+        windows = []
+        n_windows = max(1, len(bucket_starts) - n_steps + 1)
+        for i in range(n_windows):
+            # Add the buckets entering the window and subtract the one leaving it
+            entering_buckets = range(n_steps) if i == 0 else [i + n_steps - 1]
+            leaving_buckets = [] if i == 0 else [i - 1]
+            for column in window_counts:
+                for subset_counts, subset_buckets in zip(window_counts[column], bucket_counts[column]):
+                    for bucket_id in entering_buckets:
+                        if bucket_id in subset_buckets:
+                            subset_counts.update(subset_buckets[bucket_id])
+                    for bucket_id in leaving_buckets:
+                        if bucket_id in subset_buckets:
+                            subset_counts.subtract(subset_buckets[bucket_id])
+
+            # Metrics are calculated on a copy of the counts, since these change at each step
+            print(f"INFO: Calculating metrics for window {i+1} of {n_windows}.")
+            counts_of_interest = {column: [subset_counts.copy() for subset_counts in window_counts[column]] 
+                for column in window_counts}
+            results_dict, _ = self.calculate_metrics(self.args.metrics, label_values_dict, counts_of_interest)
+            windows.append({
+                "window_start": str(bucket_starts[i]),
+                "window_end": str(bucket_starts[i] + pd.Timedelta(window_size)),
+                "metrics": {metric: results_dict[metric] for metric in self.args.metrics},
+            })
+
+        windows_metadata_dict = dict(self.metadata_dict)
+        windows_metadata_dict.update({"window_var": window_var, "window_size": window_size, 
+            "window_step": window_step})
+        self.windows_dict = {"metadata": windows_metadata_dict, "windows": windows}
+
+        return self.windows_dict
+
+
+    def inspect_rollups(self,
+                        var_combinations = None
+                        ):
+        """Carries out the analysis for several combinations of variables at once (e.g., each 
+        variable alone and their intersection). Texts are tokenized and counted only once, over 
+        the finest intersection of all `var_names` (i.e., each observed combination of their 
+        values); the counts of the subsets of interest of each combination are then obtained by 
+        summing the counts of the corresponding cells. Only metrics in `COUNTS_METRICS` (i.e., 
+        all built-in metrics except `lex_art`) are supported.
+
+        Parameters
+        ----------
+        var_combinations: `List`, *optional*
+            A list of combinations (lists) of variables among `var_names`. Defaults to None, 
+            i.e., all the combinations of one or more variables.
+
+        Returns
+        -------
+        rollups_dict: `dict`
+            A dictionary with an output dictionary (as returned by `inspect()`) for each 
+            combination of variables, keyed by their names joined by "::".
+        """
+
+        for metric in self.args.metrics:
+            if metric not in metrics.COUNTS_METRICS:
+                sys.exit(f"ERROR: The metric '{metric}' is not supported for combinations of variables. Supported metrics are {metrics.COUNTS_METRICS}.")
+        if var_combinations is None:
+            var_combinations = [list(var_combination) for n_vars in range(1, len(self.args.var_names) + 1) 
+                for var_combination in itertools.combinations(self.args.var_names, n_vars)]
+        for var_combination in var_combinations:
+            if (len(var_combination) == 0) or any(var_name not in self.args.var_names for var_name in var_combination):
+                sys.exit(f"ERROR: The combination of variables {var_combination} should be a non-empty list of variables among {self.args.var_names}.")
+
+        self.tokenize()
+        dataframe = self.dataframe
+        if self.discretize == True:
+            dataframe = self.handle_bins_and_granularity()
+        print("INFO: Counting the texts of each intersection of all variables...")
+        cell_counts_dict = {text_name: metrics.get_cell_counts(dataframe, tok_column, self.args.var_names, 
+            self.args) for text_name, tok_column in self.tokenizer.tokenized_col_dict.items()}
+
+        rollups_dict = dict()
+        for var_combination in var_combinations:
+            print(f"INFO: Calculating metrics for the combination of variables {var_combination}.")
+            label_values_dict = preprocess_utils.get_label_values(dataframe, {utils.LABEL_COLS_KEY: var_combination})
+            counts_of_interest = metrics.rollup_subset_counts(cell_counts_dict, self.args.var_names, 
+                label_values_dict, self.args.text_names)
+            if (len(var_combination) > 1) or (len(self.args.text_names) > 1):
+                label_values_dict = preprocess_utils.update_label_values_dict_with_inters(
+                    label_values_dict, self.args.text_names)
+            results_dict, _ = self.calculate_metrics(self.args.metrics, label_values_dict, counts_of_interest)
+
+            # Metadata follow those of an analysis of the current combination of variables only
+            var_positions = [self.args.var_names.index(var_name) for var_name in var_combination]
+            rollup_metadata_dict = dict(self.metadata_dict)
+            for arg_name in ["var_names", "var_types", "var_semantics", "var_bins"]:
+                rollup_metadata_dict[arg_name] = [self.metadata_dict[arg_name][i] for i in var_positions]
+            rollups_dict[utils.MULTI_VAR_SEP.join(var_combination)] = {
+                "metadata": rollup_metadata_dict,
+                "metrics": {metric: results_dict[metric] for metric in self.args.metrics},
+            }
+        self.rollups_dict = rollups_dict
+
+        return rollups_dict
+
+
     def save_output_to_json(self,
-                            output_path = "output.json"
+                            output_path = "output.json",
+                            indent = 4,
+                            binary = False
                             ):
         """Saves the output dictionary to a json file, which can then be imported with the 
-        Visualizer module."""
+        Visualizer module. The output is written incrementally (metric by metric, label by 
+        label) to avoid building the whole json string in memory. If `indent` is None, the 
+        output is written in its most compact form. The file is compressed if `output_path` 
+        ends with ".gz", ".bz2", or ".xz". If `binary` is True, the output dictionary is 
+        instead saved in the (faster) binary pickle format, e.g., to "output.pkl"."""
 
-        output_file = open(output_path, "w")
-        json.dump(self.output_dict, output_file, indent=4)
-        output_file.close()
-        
+        if binary == True:
+            with utils.open_output_file(output_path, "wb") as output_file:
+                pickle.dump(self.output_dict, output_file, protocol=pickle.HIGHEST_PROTOCOL)
+        else:
+            with utils.open_output_file(output_path, "w") as output_file:
+                utils.dump_json_stream(self.output_dict, output_file, indent=indent)
+
+
+    def save_output_to_table(self,
+                             output_folder = "output",
+                             table_format = "parquet"
+                             ):
+        """Saves the output to a folder in a columnar format which can then be imported with 
+        the Visualizer module (by passing the folder path). The metadata is saved to a json 
+        file (utils.RESULTS_METADATA_FILENAME), whereas the results of each metric are saved 
+        as a long-form table (one row for each variable value(s), n-gram, and value; or for 
+        each variable value(s) and statistic for "stats") to `{metric}.parquet` (if 
+        `table_format` is "parquet") or `{metric}.arrow` (if `table_format` is "arrow", 
+        i.e., the Arrow IPC format). Compared to json, tables are faster to load and can be 
+        read selectively (e.g., only the rows of the n-grams of interest)."""
+
+        if table_format not in utils.TABLE_FORMATS_EXTENSIONS:
+            sys.exit(f"ERROR: The table format should be one of {list(utils.TABLE_FORMATS_EXTENSIONS.keys())}, but got \"{table_format}\".")
+
+        os.makedirs(output_folder, exist_ok=True)
+        metadata_path = os.path.join(output_folder, utils.RESULTS_METADATA_FILENAME)
+        with utils.open_output_file(metadata_path, "w") as output_file:
+            utils.dump_json_stream(self.output_dict["metadata"], output_file, indent=4)
+
+        for metric, df_data in self.get_long_form_output()[utils.LONG_FORM_KEY].items():
+            table_path = os.path.join(output_folder,
+                f"{metric}{utils.TABLE_FORMATS_EXTENSIONS[table_format]}")
+            utils.save_long_form_df(df_data, table_path, table_format)
+
+
+    def get_long_form_output(self):
+        """Returns the output as ready-made long-form dataframes, i.e., a dictionary with the 
+        metadata ("metadata") and a dataframe for each metric (utils.LONG_FORM_KEY), which can 
+        be passed directly to the Visualizer module without going through json. Dataframes are 
+        kept across analyses and only built again for the metrics whose results have changed 
+        (e.g., after `update_args(metrics=...)`)."""
+
+        long_form_dfs = dict()
+        for metric, metric_results in self.output_dict["metrics"].items():
+            previous_results, df_data = self.long_form_dfs.get(metric, (None, None))
+            if previous_results is not metric_results:
+                df_data = utils.get_metric_long_form_df(metric, metric_results)
+            long_form_dfs[metric] = (metric_results, df_data)
+        self.long_form_dfs = long_form_dfs
+
+        long_form_output = dict()
+        long_form_output["metadata"] = self.output_dict["metadata"]
+        long_form_output[utils.LONG_FORM_KEY] = {
+            metric: df_data for metric, (_, df_data) in long_form_dfs.items()}
+
+        return long_form_output
+
+
+
+def inspect_batch(
+    dataset: Union[Dataset, pd.DataFrame, str] = None,
+    args_list: List[InspectorArgs] = [],
+    output_folder: Optional[str] = None,
+    ) -> List[dict]:
+    """
+    Carries out the analysis for several configurations of arguments over the same dataset 
+    (e.g., a grid of variables, metrics, and `freq_cutoff` values). The dataset is loaded only 
+    once, and configurations are processed in an order that groups together those sharing the 
+    same tokenization and subsets of interest: each of these stages is thus carried out only 
+    once for each group (see `Inspector.update_args()`).
+
+    Parameters
+    ----------
+    dataset: `datasets.Dataset` or `pandas.DataFrame` or `str`
+        The dataset to be used for all the analyses (see `Inspector`).
+    args_list: `List[InspectorArgs]`
+        The list of configurations of arguments.
+    output_folder: `str`, *optional*
+        If set, the output of each configuration is saved to this folder as 
+        `output_{i}.json`, where `i` is the index of the configuration in `args_list`.
+
+    Returns
+    -------
+    outputs: `List[dict]`
+        The output dictionaries (see `Inspector.inspect()`), following the order of `args_list`.
+    """
+
+    if len(args_list) == 0:
+        sys.exit("ERROR: No configurations of arguments were provided in args_list.")
+    if output_folder is not None:
+        os.makedirs(output_folder, exist_ok=True)
+
+    # Process configurations sharing the same tokenization and then the same subsets one after the other
+    def get_group_key(args):
+        args_dict = args.to_dict()
+        return tuple(json.dumps([args_dict[arg_name] for arg_name in arg_names], sort_keys=True, default=str) 
+            for arg_names in [TOKENIZATION_ARGS, SUBSETS_ARGS])
+    order = sorted(range(len(args_list)), key=lambda i: get_group_key(args_list[i]))
+
+    outputs = [None] * len(args_list)
+    inspector = None
+    for i in order:
+        print(f"INFO: Analyzing configuration {i} ({order.index(i)+1} of {len(args_list)}).")
+        if inspector is None:
+            inspector = Inspector(dataset, replace(args_list[i]))
+        else:
+            inspector.update_args(**{arg_name: getattr(args_list[i], arg_name) 
+                for arg_name in args_list[i].__dataclass_fields__})
+        outputs[i] = inspector.inspect()
+        if output_folder is not None:
+            inspector.save_output_to_json(os.path.join(output_folder, f"output_{i}.json"))
+
+    return outputs
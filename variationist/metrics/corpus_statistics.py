@@ -1,11 +1,12 @@
 """Functions for calculating a series of statistics for a given corpus."""
 
+import functools
 import pandas as pd
 from itertools import islice
 from statistics import stdev, mean
-from tqdm import tqdm
 
-from variationist.metrics import shared_metrics
+from variationist.metrics import shared_metrics, subset_counts
+from variationist.metrics.subset_counts import SubsetCounts
 
 
 def take(n, iterable):
@@ -13,7 +14,75 @@ def take(n, iterable):
     return list(islice(iterable, n))
 
 
-def number_of_texts(label_values_dict, subsets_of_interest):
+def subset_average_text_length(subset):
+    """Returns the average length (and its standard deviation) of the texts in a subset."""
+    if isinstance(subset, SubsetCounts):
+        return subset.get_text_stat(subset_counts.TEXT_LENGTH_STAT)
+    values_list = []
+    for text in subset:
+        if len(text) == 0:
+            continue
+        values_list.append(len(text))
+    values = dict()
+    if len(values_list) == 0:
+        values["mean"] = 0
+    else:
+        values["mean"] = mean(values_list)
+    if len(values_list) < 2:
+        values["stdev"] = 0
+    else:
+        values["stdev"] = stdev(values_list)
+    return values
+
+
+def subset_num_tokens(subset):
+    """Returns the total number of tokens in a subset."""
+    if isinstance(subset, SubsetCounts):
+        return subset.get_num_tokens()
+    n_words = 0
+    for text in subset:
+        if len(text) == 0:
+            continue
+        n_words = n_words+(len(text))
+    return n_words
+
+
+def subset_vocab_size(subset):
+    """Returns the number of unique tokens in a subset."""
+    if isinstance(subset, SubsetCounts):
+        return subset.get_vocab_size()
+    vocab = set()
+    for text in subset:
+        if len(text) == 0:
+            continue
+        vocab.update(text)
+    return len(vocab)
+
+
+def subset_number_of_duplicates(subset):
+    """Returns the number of duplicate texts in a subset."""
+    if isinstance(subset, SubsetCounts):
+        return subset.get_num_duplicates()
+    text_dic = dict()
+    duplicates = 0
+    for text in subset:
+        if len(text) == 0:
+            continue
+        if " ".join(text) in text_dic:
+            duplicates += 1
+        text_dic[" ".join(text)] = ""
+    return duplicates
+
+
+def subset_frequencies(subset, top_k=None, min_score=None, approx_counters=None):
+    """Returns the frequency of tokens in a subset, sorted by descending frequency (restricted 
+    to the `top_k` most frequent tokens with frequency of at least `min_score`, if set), along 
+    with the maximum error on frequencies (if these are approximated using `approx_counters`)."""
+    mydict, max_error = shared_metrics.get_frequencies(subset, approx_counters)
+    return shared_metrics.select_top_k(mydict, top_k, min_score), max_error
+
+
+def number_of_texts(label_values_dict, subsets_of_interest, args=None):
     """Returns a dictionary with how many texts are in each subset of interest.
     
     Parameters
@@ -22,22 +91,21 @@ def number_of_texts(label_values_dict, subsets_of_interest):
         A dictionary containing all of the possible values each variable can take in the input dataset.
     subsets_of_interest: Dict
         A dictionary containing a pandas series with tokenized texts for each variable/text column combination out of the variables and text columns specified by the user.
+    args: InspectorArgs, *optional*
+        The arguments selected by the user (used for processing subsets in parallel).
         
     Returns
     -------
     values_dict: Dict
         A dict containing the length of each subset.
     """
-    values_dict = dict()
-    for column in label_values_dict:
-        for l in range(len(label_values_dict[column])):
-            curr_label = subsets_of_interest[column][l].name
-            values_dict[curr_label] = len(subsets_of_interest[column][l])
+    values_dict = shared_metrics.compute_per_subset(
+        label_values_dict, subsets_of_interest, len, args, progress_bar=False)
 
     return values_dict
 
 
-def average_text_length(label_values_dict, subsets_of_interest):
+def average_text_length(label_values_dict, subsets_of_interest, args=None):
     """Returns a dictionary with the average length of texts in each subset of interest.
     
     Parameters
@@ -46,34 +114,20 @@ def average_text_length(label_values_dict, subsets_of_interest):
         A dictionary containing all of the possible values each variable can take in the input dataset.
     subsets_of_interest: Dict
         A dictionary containing a pandas series with tokenized texts for each variable/text column combination out of the variables and text columns specified by the user.
+    args: InspectorArgs, *optional*
+        The arguments selected by the user (used for processing subsets in parallel).
         
     Returns
     -------
     values_dict: Dict
         A dict containing the average length (and its standard deviation) of texts in each subset.
     """
-    values_dict = dict()
-    for column in label_values_dict:
-        for l in range(len(label_values_dict[column])):
-            values_list = []
-            curr_label = subsets_of_interest[column][l].name
-            for text in subsets_of_interest[column][l]:
-                if len(text) == 0:
-                    continue
-                values_list.append(len(text))
-            values_dict[curr_label] = dict()
-            if len(values_list) == 0:
-                values_dict[curr_label]["mean"] = 0
-            else:
-                values_dict[curr_label]["mean"] = mean(values_list)
-            if len(values_list) < 2:
-                values_dict[curr_label]["stdev"] = 0
-            else:
-                values_dict[curr_label]["stdev"] = stdev(values_list)
+    values_dict = shared_metrics.compute_per_subset(
+        label_values_dict, subsets_of_interest, subset_average_text_length, args, progress_bar=False)
     return values_dict
 
 
-def num_tokens(label_values_dict, subsets_of_interest):
+def num_tokens(label_values_dict, subsets_of_interest, args=None):
     """Returns a dictionary with the total number of tokens in each subset.
     
     Parameters
@@ -82,25 +136,20 @@ def num_tokens(label_values_dict, subsets_of_interest):
         A dictionary containing all of the possible values each variable can take in the input dataset.
     subsets_of_interest: Dict
         A dictionary containing a pandas series with tokenized texts for each variable/text column combination out of the variables and text columns specified by the user.
+    args: InspectorArgs, *optional*
+        The arguments selected by the user (used for processing subsets in parallel).
         
     Returns
     -------
     n_word_dict: Dict
         A dict containing the total number of tokens in each subset."""
-    n_word_dict = dict()
-    for column in label_values_dict:
-        for l in range(len(label_values_dict[column])):
-            curr_label = subsets_of_interest[column][l].name
-            n_word_dict[curr_label] = 0
-            for text in subsets_of_interest[column][l]:
-                if len(text) == 0:
-                    continue
-                n_word_dict[curr_label] = n_word_dict[curr_label]+(len(text))
+    n_word_dict = shared_metrics.compute_per_subset(
+        label_values_dict, subsets_of_interest, subset_num_tokens, args, progress_bar=False)
     
     return n_word_dict
 
 
-def vocab_size(label_values_dict, subsets_of_interest):
+def vocab_size(label_values_dict, subsets_of_interest, args=None):
     """Returns a dictionary with the total number of unique tokens in each subset - i.e. the size of the vocabulary for each subset.
     
     Parameters
@@ -109,26 +158,20 @@ def vocab_size(label_values_dict, subsets_of_interest):
         A dictionary containing all of the possible values each variable can take in the input dataset.
     subsets_of_interest: Dict
         A dictionary containing a pandas series with tokenized texts for each variable/text column combination out of the variables and text columns specified by the user.
+    args: InspectorArgs, *optional*
+        The arguments selected by the user (used for processing subsets in parallel).
         
     Returns
     -------
     vocab_dict: Dict
         A dict containing the vocabulary size of each subset."""
-    vocab_dict = dict()
-    for column in label_values_dict:
-        for l in range(len(label_values_dict[column])):
-            curr_label = subsets_of_interest[column][l].name
-            vocab_dict[curr_label] = set()
-            for text in subsets_of_interest[column][l]:
-                if len(text) == 0:
-                    continue
-                vocab_dict[curr_label].update(text)
-            vocab_dict[curr_label] = len(vocab_dict[curr_label])
+    vocab_dict = shared_metrics.compute_per_subset(
+        label_values_dict, subsets_of_interest, subset_vocab_size, args, progress_bar=False)
 
     return vocab_dict
 
 
-def number_of_duplicates(label_values_dict, subsets_of_interest):
+def number_of_duplicates(label_values_dict, subsets_of_interest, args=None):
     """Returns a dictionary with the number of duplicate texts in each subset of interest.
     
     Parameters
@@ -137,25 +180,15 @@ def number_of_duplicates(label_values_dict, subsets_of_interest):
         A dictionary containing all of the possible values each variable can take in the input dataset.
     subsets_of_interest: Dict
         A dictionary containing a pandas series with tokenized texts for each variable/text column combination out of the variables and text columns specified by the user.
+    args: InspectorArgs, *optional*
+        The arguments selected by the user (used for processing subsets in parallel).
         
     Returns
     -------
     duplicates_dict: Dict
         A dict containing the number of duplicate texts in each subset."""
-        
-    duplicates_dict = dict()
-    for column in label_values_dict:
-        for l in range(len(label_values_dict[column])):
-            text_dic = dict()
-            duplicates = 0
-            curr_label = subsets_of_interest[column][l].name
-            for text in subsets_of_interest[column][l]:
-                if len(text) == 0:
-                    continue
-                if " ".join(text) in text_dic:
-                    duplicates += 1
-                text_dic[" ".join(text)] = ""
-            duplicates_dict[curr_label] = duplicates
+    duplicates_dict = shared_metrics.compute_per_subset(
+        label_values_dict, subsets_of_interest, subset_number_of_duplicates, args, progress_bar=False)
 
     return duplicates_dict
 
@@ -175,16 +208,16 @@ def create_frequency_dictionary(label_values_dict, subsets_of_interest, args):
     Returns
     -------
     output_freqs: Dict
-        A dict containing the frequency of each token for each subset of interest."""
-    output_freqs = dict()
-    for column in label_values_dict:
-        for l in tqdm(range(len(label_values_dict[column]))):
-            curr_label = subsets_of_interest[column][l].name
-            mydict = shared_metrics.get_all_frequencies(subsets_of_interest[column][l])
-            sorted_mydict = sorted(mydict.items(), key=lambda x:x[1], reverse=True)
-            converted_dict = dict(sorted_mydict)
-            output_freqs[curr_label] = converted_dict
-            # print("most frequent", curr_label, take(10, converted_dict.items())) #print for debug          
+        A dict containing the frequency of each token for each subset of interest (restricted to 
+        the `top_k` most frequent tokens with frequency of at least `min_score`, if set)."""
+    output_freqs = shared_metrics.compute_per_subset(label_values_dict, subsets_of_interest, 
+        functools.partial(subset_frequencies, top_k=args.top_k, min_score=args.min_score, 
+        approx_counters=args.approx_counters), args)
+    max_errors = [max_error for _, max_error in output_freqs.values()]
+    if args.approx_counters is not None:
+        shared_metrics.record_approx_errors({str(label): max_error for label, (_, max_error) in output_freqs.items()})
+    output_freqs = {label: freqs for label, (freqs, _) in output_freqs.items()}
+    shared_metrics.report_approx_errors(max_errors, args)
     return output_freqs
 
 
@@ -212,11 +245,11 @@ def compute_basic_stats(label_values_dict, subsets_of_interest, args):
                  "vocab_size",
                  "num_duplicates"]:
         stats_dict[stat] = {}
-    stats_dict["num_texts"][list(label_values_dict.keys())[0]] = number_of_texts(label_values_dict, subsets_of_interest)
-    stats_dict["avg_text_len"][list(label_values_dict.keys())[0]] = average_text_length(label_values_dict, subsets_of_interest)
-    stats_dict["num_tokens"][list(label_values_dict.keys())[0]] = num_tokens(label_values_dict, subsets_of_interest)
-    stats_dict["vocab_size"][list(label_values_dict.keys())[0]] = vocab_size(label_values_dict, subsets_of_interest)
-    stats_dict["num_duplicates"][list(label_values_dict.keys())[0]] = number_of_duplicates(label_values_dict, subsets_of_interest)
+    stats_dict["num_texts"][list(label_values_dict.keys())[0]] = number_of_texts(label_values_dict, subsets_of_interest, args)
+    stats_dict["avg_text_len"][list(label_values_dict.keys())[0]] = average_text_length(label_values_dict, subsets_of_interest, args)
+    stats_dict["num_tokens"][list(label_values_dict.keys())[0]] = num_tokens(label_values_dict, subsets_of_interest, args)
+    stats_dict["vocab_size"][list(label_values_dict.keys())[0]] = vocab_size(label_values_dict, subsets_of_interest, args)
+    stats_dict["num_duplicates"][list(label_values_dict.keys())[0]] = number_of_duplicates(label_values_dict, subsets_of_interest, args)
     # print(stats_dict)
     return stats_dict
 
@@ -1,6 +1,9 @@
+import functools
 import math
 from statistics import stdev, mean
-from tqdm import tqdm
+
+from variationist.metrics import shared_metrics
+from variationist.metrics.subset_counts import SubsetCounts
 
 
 def safe_divide(numerator, denominator):
@@ -13,6 +16,56 @@ def safe_divide(numerator, denominator):
     return result
 
 
+def ttr_score(tok, typ):
+    """Returns the Type Token Ratio given the number of tokens and types of a text."""
+    return safe_divide(typ,tok)
+
+
+def rttr_score(tok, typ):
+    """Returns the Root Type Token Ratio given the number of tokens and types of a text."""
+    return safe_divide(typ,math.sqrt(tok))
+
+
+def maas_score(tok, typ):
+    """Returns Maas's index given the number of tokens and types of a text."""
+    return safe_divide((math.log10(tok)-math.log10(typ)), math.pow(math.log10(tok),2))
+
+
+def lttr_score(tok, typ):
+    """Returns the Log Type Token Ratio given the number of tokens and types of a text."""
+    return safe_divide(math.log10(typ), math.log10(tok))
+
+
+def subset_diversity(subset, score_fn):
+    """Returns the mean and standard deviation of the `score_fn` scores of the texts in a subset."""
+    if isinstance(subset, SubsetCounts):
+        return subset.get_text_stat(score_fn.__name__)
+    values_list = []
+    for sentence in subset:
+        if len(sentence) == 0:
+            continue
+        tok = len(sentence)
+        typ = len(list(dict.fromkeys(sentence)))
+        values_list.append(score_fn(tok, typ))
+    values = dict()
+    if len(values_list) == 0:
+        values["mean"] = 0
+    else:
+        values["mean"] = mean(values_list)
+    if len(values_list) < 2:
+        values["stdev"] = 0
+    else:
+        values["stdev"] = stdev(values_list)
+
+    return values
+
+
+def diversity(label_values_dict, subsets_of_interest, args, score_fn):
+    """Calculates the mean and standard deviation of the `score_fn` scores for each subset."""
+    return shared_metrics.compute_per_subset(label_values_dict, subsets_of_interest, 
+        functools.partial(subset_diversity, score_fn=score_fn), args)
+
+
 def ttr(label_values_dict, subsets_of_interest, args):
     """Calculates Type Token Ratio.
     
@@ -30,28 +83,7 @@ def ttr(label_values_dict, subsets_of_interest, args):
     values_dict: Dict
         A dictionary with the mean TTR score for each subset and its standard deviation.
     """
-    values_dict = dict()
-    for column in label_values_dict:
-        for l in tqdm(range(len(label_values_dict[column]))):
-            values_list = []
-            curr_label = subsets_of_interest[column][l].name
-            for sentence in subsets_of_interest[column][l]:
-                if len(sentence) == 0:
-                    continue
-                tok = len(sentence)
-                typ = len(list(dict.fromkeys(sentence)))
-                values_list.append(safe_divide(typ,tok))
-            values_dict[curr_label] = dict()
-            if len(values_list) == 0:
-                values_dict[curr_label]["mean"] = 0
-            else:
-                values_dict[curr_label]["mean"] = mean(values_list)
-            if len(values_list) < 2:
-                values_dict[curr_label]["stdev"] = 0
-            else:
-                values_dict[curr_label]["stdev"] = stdev(values_list)
-
-    # print("TTR: ",values_dict)
+    values_dict = diversity(label_values_dict, subsets_of_interest, args, ttr_score)
 
     return values_dict
 
@@ -73,28 +105,7 @@ def rttr(label_values_dict, subsets_of_interest, args):
     values_dict: Dict
         A dictionary with the mean RTTR score for each subset and its standard deviation.
     """
-    values_dict = dict()
-    for column in label_values_dict:
-        for l in tqdm(range(len(label_values_dict[column]))):
-            values_list = []
-            curr_label = subsets_of_interest[column][l].name
-            for sentence in subsets_of_interest[column][l]:
-                if len(sentence) == 0:
-                    continue
-                tok = len(sentence)
-                typ = len(list(dict.fromkeys(sentence)))
-                values_list.append(safe_divide(typ,math.sqrt(tok)))
-            values_dict[curr_label] = dict()
-            if len(values_list) == 0:
-                values_dict[curr_label]["mean"] = 0
-            else:
-                values_dict[curr_label]["mean"] = mean(values_list)
-            if len(values_list) < 2:
-                values_dict[curr_label]["stdev"] = 0
-            else:
-                values_dict[curr_label]["stdev"] = stdev(values_list)
-
-    # print("RTTR: ",values_dict)
+    values_dict = diversity(label_values_dict, subsets_of_interest, args, rttr_score)
 
     return values_dict
 
@@ -116,28 +127,7 @@ def maas(label_values_dict, subsets_of_interest, args):
     values_dict: Dict
         A dictionary with the mean Maas index score for each subset and its standard deviation.
     """
-    values_dict = dict()
-    for column in label_values_dict:
-        for l in tqdm(range(len(label_values_dict[column]))):
-            values_list = []
-            curr_label = subsets_of_interest[column][l].name
-            for sentence in subsets_of_interest[column][l]:
-                if len(sentence) == 0:
-                    continue
-                tok = len(sentence)
-                typ = len(list(dict.fromkeys(sentence)))
-                values_list.append(safe_divide((math.log10(tok)-math.log10(typ)), math.pow(math.log10(tok),2)))
-            values_dict[curr_label] = dict()
-            if len(values_list) == 0:
-                values_dict[curr_label]["mean"] = 0
-            else:
-                values_dict[curr_label]["mean"] = mean(values_list)
-            if len(values_list) < 2:
-                values_dict[curr_label]["stdev"] = 0
-            else:
-                values_dict[curr_label]["stdev"] = stdev(values_list)
-
-    # print("MAAS: ",values_dict)
+    values_dict = diversity(label_values_dict, subsets_of_interest, args, maas_score)
 
     return values_dict
 
@@ -159,28 +149,7 @@ def lttr(label_values_dict, subsets_of_interest, args):
     values_dict: Dict
         A dictionary with the mean LTTR score for each subset and its standard deviation.
     """
-    values_dict = dict()
-    for column in label_values_dict:
-        for l in tqdm(range(len(label_values_dict[column]))):
-            values_list = []
-            curr_label = subsets_of_interest[column][l].name
-            for sentence in subsets_of_interest[column][l]:
-                if len(sentence) == 0:
-                    continue
-                tok = len(sentence)
-                typ = len(list(dict.fromkeys(sentence)))
-                values_list.append(safe_divide(math.log10(typ), math.log10(tok)))
-            values_dict[curr_label] = dict()
-            if len(values_list) == 0:
-                values_dict[curr_label]["mean"] = 0
-            else:
-                values_dict[curr_label]["mean"] = mean(values_list)
-            if len(values_list) < 2:
-                values_dict[curr_label]["stdev"] = 0
-            else:
-                values_dict[curr_label]["stdev"] = stdev(values_list)
-
-    # print("LTTR: ",values_dict)
-    
+    values_dict = diversity(label_values_dict, subsets_of_interest, args, lttr_score)
+
     return values_dict
 
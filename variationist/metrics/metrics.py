@@ -1,8 +1,22 @@
+import functools
+import itertools
 from typing import Callable, Union
 
+from variationist.data import preprocess_utils
 from variationist.metrics import corpus_statistics
 from variationist.metrics import lexical_variation
 from variationist.metrics import pmi
+from variationist.metrics import shared_metrics
+from variationist.metrics.subset_counts import SubsetCounts
+
+
+# Built-in metrics which can be calculated from SubsetCounts only (i.e., without accessing texts)
+COUNTS_METRICS = ["pmi", "n_pmi", "p_pmi", "np_pmi", "w_pmi", "nw_pmi", "pw_pmi", "npw_pmi", 
+    "np_relevance", "nw_relevance", "npw_relevance", "ttr", "root_ttr", "maas", "log_ttr", "freq", "stats"]
+
+# Per-text statistics stored in SubsetCounts, as needed by lexical variation metrics
+TEXT_STAT_FNS = [lexical_variation.ttr_score, lexical_variation.rttr_score, 
+    lexical_variation.maas_score, lexical_variation.lttr_score]
 
 
 class Metric:
@@ -48,8 +62,8 @@ class Metric:
             self.metric_fn = pmi.class_relevance_normalized_weighted
         elif self.metric == "npw_relevance":
             self.metric_fn = pmi.class_relevance_positive_normalized_weighted
-        # elif self.metric == "lex_art":
-        #     self.metric_fn = pmi.pmi_lexical_artifacts
+        elif self.metric == "lex_art":
+            self.metric_fn = pmi.pmi_lexical_artifacts
         elif self.metric == "ttr":
             self.metric_fn = lexical_variation.ttr
         elif self.metric == "root_ttr":
@@ -86,3 +100,272 @@ class Metric:
             A `dict` with the results of the calculated metric function.
             """
         return self.metric_fn(label_values_dict, subsets_of_interest, self.args)
+
+
+def calculate_metric(metric, args, label_values_dict, subsets_of_interest):
+    """Creates the Metric object for the given metric and calculates it. This is a module-level 
+    function so that it can also be run by worker processes when metrics are computed in parallel.
+    
+    Parameters
+    ----------
+    metric: `Union[str, Callable[[dict, dict], dict]]`
+        A metric's name (if chosen among the ones natively supported by Variationist), or a callable function.
+    args: InspectorArgs
+        The arguments selected by the user.
+    label_values_dict: dict
+        A dictionary containing all of the possible values each variable can take in the input dataset.
+    subsets_of_interest: dict
+        A dictionary containing a pandas series with tokenized texts for each variable/text column combination out of the variables and text columns specified by the user.
+    
+    Returns
+    -------
+    :dict
+        A `dict` with the results of the calculated metric function.
+    approx_errors: dict
+        A `dict` with the maximum error on the token frequencies of each subset, if these have been 
+        approximated by the metric (see `approx_counters`), o.w. an empty `dict`.
+    """
+    current_metric = Metric(metric, args)
+    metric_name = metric if (type(metric) is str) else metric.__name__
+    print(f"INFO: Currently calculating metric: '{metric_name}'")
+
+    # Collect the errors of approximate frequencies (if any) recorded while calculating the metric
+    shared_metrics.APPROX_ERRORS.errors = dict()
+    try:
+        metric_result = current_metric.calculate_metric(label_values_dict, subsets_of_interest)
+        approx_errors = shared_metrics.APPROX_ERRORS.errors
+    finally:
+        shared_metrics.APPROX_ERRORS.errors = None
+
+    return metric_result, approx_errors
+
+
+def count_subset(subset):
+    """Returns the SubsetCounts of a subset (pandas Series) of tokenized texts."""
+    return SubsetCounts(subset.name, TEXT_STAT_FNS).add_texts(subset)
+
+
+def count_subset_buckets(subset, bucket_ids):
+    """Returns a dictionary with the SubsetCounts of the texts of a subset (pandas Series) in each 
+    bucket, given the buckets of all texts (a pandas Series with the same index as the dataframe)."""
+    bucket_counts = dict()
+    for bucket_id, bucket_subset in subset.groupby(bucket_ids.loc[subset.index].values):
+        bucket_counts[bucket_id] = SubsetCounts(subset.name, TEXT_STAT_FNS).add_texts(bucket_subset)
+
+    return bucket_counts
+
+
+def get_bucket_counts(label_values_dict, subsets_of_interest, bucket_ids, args=None):
+    """Counts each subset of interest separately for each bucket (e.g., a time bucket) of its 
+    texts, in a single pass over texts. Subsets are counted in parallel if `subset_n_jobs` is 
+    set in the InspectorArgs `args`.
+    
+    Parameters
+    ----------
+    label_values_dict: dict
+        A dictionary containing all of the possible values each variable can take in the input dataset.
+    subsets_of_interest: dict
+        A dictionary containing a pandas series with tokenized texts for each variable/text column combination out of the variables and text columns specified by the user.
+    bucket_ids: pandas.Series
+        The bucket of each text of the dataframe.
+    args: InspectorArgs, *optional*
+        The arguments selected by the user.
+    
+    Returns
+    -------
+    bucket_counts_of_interest: dict
+        The same dictionary as subsets_of_interest, with dictionaries of SubsetCounts for each 
+        bucket (keys) in place of pandas series.
+    """
+    bucket_counts_of_interest = dict()
+    for column in label_values_dict:
+        subsets = shared_metrics.get_subsets(label_values_dict, subsets_of_interest, column)
+        bucket_counts_of_interest[column] = shared_metrics.map_subsets(functools.partial(
+            count_subset_buckets, bucket_ids=bucket_ids), subsets, args)
+
+    return bucket_counts_of_interest
+
+
+def get_cell_counts(dataframe, tokenized_column, var_names, args=None):
+    """Counts the texts of each cell of the finest intersection of the given variables (i.e., 
+    each observed combination of their values), in a single pass over texts. Cells are counted 
+    in parallel if `subset_n_jobs` is set in the InspectorArgs `args`.
+    
+    Parameters
+    ----------
+    dataframe: pandas.DataFrame
+        The dataset to be analyzed, including the tokenized text column.
+    tokenized_column: str
+        The name of the column containing the tokenized texts.
+    var_names: list
+        The list of variable names.
+    args: InspectorArgs, *optional*
+        The arguments selected by the user.
+    
+    Returns
+    -------
+    cell_counts: dict
+        A dictionary with the SubsetCounts of each cell, keyed by the tuple of variable values.
+    """
+    cells = [cell_subset.rename(cell) for cell, cell_subset in dataframe[tokenized_column].groupby(
+        [dataframe[var_name] for var_name in var_names], dropna=False, observed=True, sort=False)]
+    cell_counts = shared_metrics.map_subsets(count_subset, cells, args)
+
+    return {subset_counts.name: subset_counts for subset_counts in cell_counts}
+
+
+def rollup_subset_counts(cell_counts_dict, var_names, label_values_dict, text_names):
+    """Sums the counts of the cells of the finest intersection of `var_names` into the subsets of 
+    interest for a subset of those variables (the keys of label_values_dict), without accessing 
+    texts. Subsets are named and ordered as the ones built by `preprocess_utils`.
+    
+    Parameters
+    ----------
+    cell_counts_dict: dict
+        A dictionary with the cell counts (see `get_cell_counts`) for each text column name.
+    var_names: list
+        The list of variable names of the cells.
+    label_values_dict: dict
+        A dictionary containing all of the possible values of each variable to roll up to.
+    text_names: list
+        The list of text column names.
+    
+    Returns
+    -------
+    counts_of_interest: dict
+        The SubsetCounts for each variable/text column combination.
+    """
+    rollup_vars = list(label_values_dict.keys())
+    positions = [var_names.index(var_name) for var_name in rollup_vars]
+    is_intersection = (len(rollup_vars) > 1) or (len(text_names) > 1)
+    var_combination_name = "::".join(rollup_vars)
+    if len(text_names) > 1:
+        var_combination_name = f"text_name::{var_combination_name}"
+
+    counts_of_interest = {var_combination_name: []}
+    for text_name in text_names:
+        # Sum the counts of all cells sharing the same values for the variables to roll up to
+        rollup_counts = dict()
+        for cell, cell_counts in cell_counts_dict[text_name].items():
+            rollup_cell = tuple(cell[position] for position in positions)
+            if rollup_cell not in rollup_counts:
+                rollup_counts[rollup_cell] = SubsetCounts(rollup_cell, TEXT_STAT_FNS)
+            rollup_counts[rollup_cell].update(cell_counts)
+
+        for intersection in itertools.product(*label_values_dict.values()):
+            if is_intersection:
+                subset_name = "::".join(map(str, intersection))
+                if len(text_names) > 1:
+                    subset_name = f"{text_name}::{subset_name}"
+            else:
+                subset_name = intersection[0]
+            subset_counts = SubsetCounts(subset_name, TEXT_STAT_FNS)
+            if intersection in rollup_counts:
+                subset_counts.update(rollup_counts[intersection])
+            counts_of_interest[var_combination_name].append(subset_counts)
+
+    return counts_of_interest
+
+
+def get_subset_counts(label_values_dict, subsets_of_interest, args=None):
+    """Counts each subset of interest, so that metrics in COUNTS_METRICS can later be calculated 
+    (and updated) without accessing texts. Subsets are counted in parallel if `subset_n_jobs` is 
+    set in the InspectorArgs `args`.
+    
+    Parameters
+    ----------
+    label_values_dict: dict
+        A dictionary containing all of the possible values each variable can take in the input dataset.
+    subsets_of_interest: dict
+        A dictionary containing a pandas series with tokenized texts for each variable/text column combination out of the variables and text columns specified by the user.
+    args: InspectorArgs, *optional*
+        The arguments selected by the user.
+    
+    Returns
+    -------
+    counts_of_interest: dict
+        The same dictionary as subsets_of_interest, with SubsetCounts in place of pandas series.
+    """
+    counts_of_interest = dict()
+    for column in label_values_dict:
+        subsets = shared_metrics.get_subsets(label_values_dict, subsets_of_interest, column)
+        counts_of_interest[column] = shared_metrics.map_subsets(count_subset, subsets, args)
+
+    return counts_of_interest
+
+
+def merge_subset_counts(var_label_values_dict, label_values_dict, counts_of_interest, 
+                        new_var_label_values_dict, new_label_values_dict, new_counts_of_interest, text_names):
+    """Merges the SubsetCounts of two sets of subsets of interest (e.g., from a previous and a new 
+    analysis over the same variables), matching subsets by name. The label values of each variable 
+    are merged first (values only found in the new ones follow the previous ones), and the subsets 
+    of interest are then rebuilt from them as in a single analysis over both data, i.e., with all 
+    the intersections of label values (empty for those which do not occur in any of the data), in 
+    the same order. Input counts are left unchanged.
+    
+    Parameters
+    ----------
+    var_label_values_dict: dict
+        A dictionary containing all of the possible values each variable can take in the previous data.
+    label_values_dict: dict
+        A dictionary containing the names of the subsets of interest in the previous data.
+    counts_of_interest: dict
+        The SubsetCounts for each variable/text column combination in the previous data.
+    new_var_label_values_dict: dict
+        A dictionary containing all of the possible values each variable can take in the new data.
+    new_label_values_dict: dict
+        A dictionary containing the names of the subsets of interest in the new data.
+    new_counts_of_interest: dict
+        The SubsetCounts for each variable/text column combination in the new data.
+    text_names: list
+        The list of text column names.
+    
+    Returns
+    -------
+    merged_var_label_values_dict: dict
+        A dictionary containing all of the possible values each variable can take in both data.
+    merged_label_values_dict: dict
+        A dictionary containing the names of the subsets of interest in both data.
+    merged_counts_of_interest: dict
+        The merged SubsetCounts for each variable/text column combination.
+    """
+    merged_var_label_values_dict = dict()
+    for var_name in new_var_label_values_dict:
+        label_values = list(var_label_values_dict.get(var_name, []))
+        label_values += [label_value for label_value in new_var_label_values_dict[var_name] 
+            if label_value not in label_values]
+        merged_var_label_values_dict[var_name] = label_values
+
+    # Sum the counts of the subsets with the same name in both data
+    named_counts = dict()
+    for current_label_values_dict, current_counts_of_interest in [(label_values_dict, counts_of_interest), 
+                                                                  (new_label_values_dict, new_counts_of_interest)]:
+        for column in current_label_values_dict:
+            for subset_counts in shared_metrics.get_subsets(current_label_values_dict, current_counts_of_interest, column):
+                if (column, subset_counts.name) in named_counts:
+                    named_counts[(column, subset_counts.name)].update(subset_counts)
+                else:
+                    named_counts[(column, subset_counts.name)] = subset_counts.copy()
+
+    # Rebuild the subsets of interest (named and ordered as the ones built by `preprocess_utils`)
+    if (len(merged_var_label_values_dict) == 1) and (len(text_names) == 1):
+        merged_label_values_dict = merged_var_label_values_dict
+        subset_names = {var_name: label_values for var_name, label_values in merged_label_values_dict.items()}
+    else:
+        merged_label_values_dict = preprocess_utils.update_label_values_dict_with_inters(
+            merged_var_label_values_dict, text_names)
+        var_combination_name = list(merged_label_values_dict.keys())[0]
+        subset_names = {var_combination_name: []}
+        for text_name in text_names:
+            for intersection in itertools.product(*merged_var_label_values_dict.values()):
+                subset_name = "::".join(map(str, intersection))
+                if len(text_names) > 1:
+                    subset_name = f"{text_name}::{subset_name}"
+                subset_names[var_combination_name].append(subset_name)
+
+    merged_counts_of_interest = dict()
+    for column in subset_names:
+        merged_counts_of_interest[column] = [named_counts.get((column, subset_name), 
+            SubsetCounts(subset_name, TEXT_STAT_FNS)) for subset_name in subset_names[column]]
+
+    return merged_var_label_values_dict, merged_label_values_dict, merged_counts_of_interest
@@ -1,3 +1,4 @@
+import functools
 import math
 import numpy as np
 import pandas as pd
@@ -30,40 +31,78 @@ def get_total(freqs_merged_dict):
     return total
 
 
-def create_pmi_dictionary(label_values_dict, subsets_of_interest, weighted, freq_cutoff):
-    """Creates a dictionary of pmi values for each label."""
-    output_pmi = dict()
+def get_pmi_counts(label_values_dict, subsets_of_interest, freq_cutoff, approx_counters=None, args=None):
+    """Counts token frequencies for each label and overall, for the calculation of pmi-based 
+    metrics. Token frequencies are counted for each subset in parallel if `subset_n_jobs` is set 
+    in the InspectorArgs `args`. Unless token frequencies are approximated, tokens are first 
+    counted over all subsets so that those below `freq_cutoff` are never stored in the per-subset 
+    frequency dictionaries. Returns the per-label frequencies, the overall frequencies of tokens 
+    above `freq_cutoff`, the total number of tokens, the number of texts for each label, and the 
+    maximum error on the (approximate) frequencies of each label."""
     freqs_dict = dict()
     freqs_merged_dict = dict()
-    totals_dict = dict()
     label_count = dict()
+    max_errors_dict = dict()
+
+    vocabulary = None
+    if (approx_counters is None) and (freq_cutoff > 1):
+        # First pass: get overall token frequencies and the total, then prune rare tokens
+        freqs_merged_dict = shared_metrics.get_overall_frequencies(
+            label_values_dict, subsets_of_interest)
+        total = get_total(freqs_merged_dict)
+        freqs_merged_dict = {
+            tok: count for tok, count in freqs_merged_dict.items() if count >= freq_cutoff
+        }
+        vocabulary = freqs_merged_dict
 
     for column in label_values_dict:
         # print(subsets_of_interest[column])
-        for l in tqdm(range(len(label_values_dict[column]))):
-            curr_label = subsets_of_interest[column][l].name
-            mydict = shared_metrics.get_all_frequencies(subsets_of_interest[column][l])
+        subsets = shared_metrics.get_subsets(label_values_dict, subsets_of_interest, column)
+        subsets_freqs = shared_metrics.map_subsets(functools.partial(
+            shared_metrics.get_frequencies, approx_counters=approx_counters, vocabulary=vocabulary), 
+            subsets, args)
+        for subset, (mydict, max_error) in zip(subsets, subsets_freqs):
+            curr_label = subset.name
             freqs_dict[curr_label] = mydict
-            tok_list = list(mydict.keys())
+            max_errors_dict[str(curr_label)] = max_error
 
-            for i in range(len(tok_list)):
-                tok = tok_list[i]
-                if tok not in freqs_merged_dict:
-                    freqs_merged_dict[tok] = 0
-                freqs_merged_dict[tok] += mydict[tok]
+            # Overall frequencies are only left to be computed if there has been no first pass
+            if vocabulary is None:
+                tok_list = list(mydict.keys())
+                for i in range(len(tok_list)):
+                    tok = tok_list[i]
+                    if tok not in freqs_merged_dict:
+                        freqs_merged_dict[tok] = 0
+                    freqs_merged_dict[tok] += mydict[tok]
 
-            for i in subsets_of_interest[column][l]:
-                if curr_label not in label_count:
-                    label_count[curr_label] = 0
-                label_count[curr_label] += 1
+            if len(subset) > 0:
+                label_count[curr_label] = len(subset)
 
-    total = get_total(freqs_merged_dict)
+    shared_metrics.report_approx_errors(list(max_errors_dict.values()), args)
+
+    if vocabulary is None:
+        # Note: approximate counts still add up to the exact number of tokens
+        total = get_total(freqs_merged_dict)
 
     # Keep only tokens above the overall frequency cutoff for the PMI (the total remains the same)
     freqs_merged_dict = {
         tok: count for tok, count in freqs_merged_dict.items() if count >= freq_cutoff
     }
 
+    return freqs_dict, freqs_merged_dict, total, label_count, max_errors_dict
+
+
+def create_pmi_dictionary(label_values_dict, subsets_of_interest, weighted, freq_cutoff, args=None):
+    """Creates a dictionary of pmi values for each label. Token frequencies are shared by all 
+    pmi-based metrics computed on the same subsets of interest (see `get_pmi_counts`)."""
+    output_pmi = dict()
+
+    approx_counters = None if (args is None) else args.approx_counters
+    freqs_dict, freqs_merged_dict, total, label_count, max_errors_dict = shared_metrics.get_shared_counts(
+        get_pmi_counts, label_values_dict, subsets_of_interest, freq_cutoff, approx_counters, args=args)
+    if approx_counters is not None:
+        shared_metrics.record_approx_errors(max_errors_dict)
+
     for label in freqs_dict:
         label_pmi_dict = dict()
 
@@ -77,11 +116,9 @@ def create_pmi_dictionary(label_values_dict, subsets_of_interest, weighted, freq
                 if weighted:
                     pmi_value = pmi_value*freqs_dict[label][w]
                 label_pmi_dict[w] = pmi_value
-        
-        sorted_pmiDict = sorted(label_pmi_dict.items(), key=lambda x:x[1], reverse=True)
 
-        converted_dict = dict(sorted_pmiDict)
-        output_pmi[str(label)] = converted_dict
+        # Values are left unsorted here: ordering and top-k selection happen on the final scores
+        output_pmi[str(label)] = label_pmi_dict
 
     return output_pmi
 
@@ -103,7 +140,7 @@ def pmi(label_values_dict, subsets_of_interest, args):
     output_pmi: Dict
         A dictionary with the pmi for each token in each subset of interest.
     """
-    output_pmi = create_pmi_dictionary(label_values_dict, subsets_of_interest, False, args.freq_cutoff)
+    output_pmi = create_pmi_dictionary(label_values_dict, subsets_of_interest, False, args.freq_cutoff, args)
     
     # # Print for debug
     # for label in output_pmi:
@@ -111,6 +148,9 @@ def pmi(label_values_dict, subsets_of_interest, args):
     #     converted_dict = dict(sorted_mydict)
     #     print("\nPMI", label, take(10, converted_dict.items())) #print for debug
 
+    # Keep the top_k highest scoring tokens (if set) for each label, sorted by value
+    output_pmi = shared_metrics.select_top_k_per_label(output_pmi, args)
+
     return output_pmi
 
 
@@ -131,7 +171,7 @@ def pmi_normalized(label_values_dict, subsets_of_interest, args):
     output_pmi: Dict
         A dictionary with the normalized pmi for each token in each subset of interest.
     """
-    output_pmi = create_pmi_dictionary(label_values_dict, subsets_of_interest, False, args.freq_cutoff)
+    output_pmi = create_pmi_dictionary(label_values_dict, subsets_of_interest, False, args.freq_cutoff, args)
     min_max_list = []
     
     for label in output_pmi:
@@ -152,6 +192,9 @@ def pmi_normalized(label_values_dict, subsets_of_interest, args):
     #     converted_dict = dict(sorted_mydict)
     #     print("\nPMI normalized", label, take(10, converted_dict.items())) #print for debug
 
+    # Keep the top_k highest scoring tokens (if set) for each label, sorted by value
+    output_pmi = shared_metrics.select_top_k_per_label(output_pmi, args)
+
     return output_pmi
 
 
@@ -172,7 +215,7 @@ def pmi_positive(label_values_dict, subsets_of_interest, args):
     output_pmi: Dict
         A dictionary with the positive PMI for each token in each subset of interest.
     """
-    output_pmi = create_pmi_dictionary(label_values_dict, subsets_of_interest, False, args.freq_cutoff)
+    output_pmi = create_pmi_dictionary(label_values_dict, subsets_of_interest, False, args.freq_cutoff, args)
     
     for label in output_pmi:
         for w in output_pmi[label]:
@@ -185,6 +228,9 @@ def pmi_positive(label_values_dict, subsets_of_interest, args):
     #     converted_dict = dict(sorted_mydict)
     #     print("\nPositive PMI", label, take(10, converted_dict.items())) #print for debug
 
+    # Keep the top_k highest scoring tokens (if set) for each label, sorted by value
+    output_pmi = shared_metrics.select_top_k_per_label(output_pmi, args)
+
     return output_pmi
 
 
@@ -205,7 +251,7 @@ def pmi_positive_normalized(label_values_dict, subsets_of_interest, args):
     output_pmi: Dict
         A dictionary with the positive normalized PMI for each token in each subset of interest.
     """
-    output_pmi = create_pmi_dictionary(label_values_dict, subsets_of_interest, False, args.freq_cutoff)
+    output_pmi = create_pmi_dictionary(label_values_dict, subsets_of_interest, False, args.freq_cutoff, args)
 
     min_max_list = []
     for label in output_pmi:
@@ -231,6 +277,9 @@ def pmi_positive_normalized(label_values_dict, subsets_of_interest, args):
     #     converted_dict = dict(sorted_mydict)
     #     print("\nPositive PMI normalized", label, take(10, converted_dict.items())) #print for debug
 
+    # Keep the top_k highest scoring tokens (if set) for each label, sorted by value
+    output_pmi = shared_metrics.select_top_k_per_label(output_pmi, args)
+
     return output_pmi
 
 
@@ -251,7 +300,7 @@ def pmi_weighted(label_values_dict, subsets_of_interest, args):
     output_pmi: Dict
         A dictionary with the weighted PMI for each token in each subset of interest.
     """
-    output_pmi = create_pmi_dictionary(label_values_dict, subsets_of_interest, True, args.freq_cutoff)
+    output_pmi = create_pmi_dictionary(label_values_dict, subsets_of_interest, True, args.freq_cutoff, args)
     
     # # Print for debug
     # for label in output_pmi:
@@ -259,6 +308,9 @@ def pmi_weighted(label_values_dict, subsets_of_interest, args):
     #     converted_dict = dict(sorted_mydict)
     #     print("\nPMI weighted", label, take(10, converted_dict.items())) #print for debug
 
+    # Keep the top_k highest scoring tokens (if set) for each label, sorted by value
+    output_pmi = shared_metrics.select_top_k_per_label(output_pmi, args)
+
     return output_pmi
 
 
@@ -279,7 +331,7 @@ def pmi_normalized_weighted(label_values_dict, subsets_of_interest, args):
     output_pmi: Dict
         A dictionary with the normalized weighted PMI for each token in each subset of interest.
     """
-    output_pmi = create_pmi_dictionary(label_values_dict, subsets_of_interest, True, args.freq_cutoff)
+    output_pmi = create_pmi_dictionary(label_values_dict, subsets_of_interest, True, args.freq_cutoff, args)
 
     min_max_list = []
     for label in output_pmi:
@@ -300,6 +352,9 @@ def pmi_normalized_weighted(label_values_dict, subsets_of_interest, args):
     #     converted_dict = dict(sorted_mydict)
     #     print("\nPMI normalized weighted", label, take(10, converted_dict.items())) #print for debug
 
+    # Keep the top_k highest scoring tokens (if set) for each label, sorted by value
+    output_pmi = shared_metrics.select_top_k_per_label(output_pmi, args)
+
     return output_pmi
 
 
@@ -320,7 +375,7 @@ def pmi_positive_weighted(label_values_dict, subsets_of_interest, args):
     output_pmi: Dict
         A dictionary with the positive weighted PMI for each token in each subset of interest.
     """
-    output_pmi = create_pmi_dictionary(label_values_dict, subsets_of_interest, True, args.freq_cutoff)
+    output_pmi = create_pmi_dictionary(label_values_dict, subsets_of_interest, True, args.freq_cutoff, args)
     for label in output_pmi:
         for w in output_pmi[label]:
             if output_pmi[label][w] < 0:
@@ -332,6 +387,9 @@ def pmi_positive_weighted(label_values_dict, subsets_of_interest, args):
     #     converted_dict = dict(sorted_mydict)
     #     print("\nPositive PMI weighted", label, take(10, converted_dict.items())) #print for debug
 
+    # Keep the top_k highest scoring tokens (if set) for each label, sorted by value
+    output_pmi = shared_metrics.select_top_k_per_label(output_pmi, args)
+
     return output_pmi
 
 
@@ -352,7 +410,7 @@ def pmi_positive_normalized_weighted(label_values_dict, subsets_of_interest, arg
     output_pmi: Dict
         A dictionary with the positive normalized weighted PMI for each token in each subset of interest.
     """
-    output_pmi = create_pmi_dictionary(label_values_dict, subsets_of_interest, True, args.freq_cutoff)
+    output_pmi = create_pmi_dictionary(label_values_dict, subsets_of_interest, True, args.freq_cutoff, args)
 
     min_max_list = []
     for label in output_pmi:
@@ -377,6 +435,9 @@ def pmi_positive_normalized_weighted(label_values_dict, subsets_of_interest, arg
     #     converted_dict = dict(sorted_mydict)
     #     print("\nPositive PMI normalized weighted", label, take(10, converted_dict.items())) #print for debug
 
+    # Keep the top_k highest scoring tokens (if set) for each label, sorted by value
+    output_pmi = shared_metrics.select_top_k_per_label(output_pmi, args)
+
     return output_pmi
 
 
@@ -397,7 +458,7 @@ def class_relevance_positive_normalized(label_values_dict, subsets_of_interest,
     output_pmi: Dict
         A dictionary with the positive normalized class relevance metric for each token in each subset of interest.
     """
-    output_pmi = create_pmi_dictionary(label_values_dict, subsets_of_interest, False, args.freq_cutoff)
+    output_pmi = create_pmi_dictionary(label_values_dict, subsets_of_interest, False, args.freq_cutoff, args)
 
     for label in output_pmi:
         if len(output_pmi[label]) > 0: # if the list is not empty
@@ -413,6 +474,9 @@ def class_relevance_positive_normalized(label_values_dict, subsets_of_interest,
                 if output_pmi[label][w] < 0:
                     output_pmi[label][w] = 0
 
+    # Keep the top_k highest scoring tokens (if set) for each label, sorted by value
+    output_pmi = shared_metrics.select_top_k_per_label(output_pmi, args)
+
     return output_pmi
 
 
@@ -433,7 +497,7 @@ def class_relevance_normalized_weighted(label_values_dict, subsets_of_interest,
     output_pmi: Dict
         A dictionary with the normalized weighted class relevance metric for each token in each subset of interest.
     """
-    output_pmi = create_pmi_dictionary(label_values_dict, subsets_of_interest, True, args.freq_cutoff)
+    output_pmi = create_pmi_dictionary(label_values_dict, subsets_of_interest, True, args.freq_cutoff, args)
 
     for label in output_pmi:
         if len(output_pmi[label]) > 0: # if the list is not empty
@@ -448,6 +512,9 @@ def class_relevance_normalized_weighted(label_values_dict, subsets_of_interest,
                     (output_pmi[label][w]-min_value), (max_value-min_value)
                 )
 
+    # Keep the top_k highest scoring tokens (if set) for each label, sorted by value
+    output_pmi = shared_metrics.select_top_k_per_label(output_pmi, args)
+
     return output_pmi
 
 
@@ -468,7 +535,7 @@ def class_relevance_positive_normalized_weighted(label_values_dict, subsets_of_i
     output_pmi: Dict
         A dictionary with the positive normalized weighted class relevance metric for each token in each subset of interest.
     """
-    output_pmi = create_pmi_dictionary(label_values_dict, subsets_of_interest, True, args.freq_cutoff)
+    output_pmi = create_pmi_dictionary(label_values_dict, subsets_of_interest, True, args.freq_cutoff, args)
 
     for label in output_pmi:
         if len(output_pmi[label]) > 0: # if the list is not empty
@@ -484,6 +551,9 @@ def class_relevance_positive_normalized_weighted(label_values_dict, subsets_of_i
                 if output_pmi[label][w] < 0:
                     output_pmi[label][w] = 0
 
+    # Keep the top_k highest scoring tokens (if set) for each label, sorted by value
+    output_pmi = shared_metrics.select_top_k_per_label(output_pmi, args)
+
     return output_pmi
 
 
@@ -518,18 +588,23 @@ def pmi_lexical_artifacts(label_values_dict, subsets_of_interest, args):
                     
         uniqe_labels = list(dict.fromkeys(labels_list))
 
+        # Tokenize and count once, then reuse the counts for each label of interest
+        counts = lexical_artifacts.compute_counts(
+            texts = texts_list,
+            labels = labels_list,
+        )
+
         lexical_artifacts_dict = dict()
         for label in uniqe_labels:
-            lexical_artifacts_dict[label] = dict()
-            values_df = lexical_artifacts.compute(
-                texts = texts_list,
-                labels = labels_list,
+            values_df = lexical_artifacts.compute_from_counts(
+                counts = counts,
                 label_of_interest = label,
             )
                 
-            top_k = len(values_df)
-                
-            for token, row in values_df.head(top_k).iterrows():
-                lexical_artifacts_dict[label][token] = row[values_df.columns[0]]
-                
+            lexical_artifacts_dict[label] = dict(zip(
+                values_df.index, values_df[values_df.columns[0]].tolist()))
+
+        # Keep the top_k highest scoring tokens (if set) for each label, sorted by value
+        lexical_artifacts_dict = shared_metrics.select_top_k_per_label(lexical_artifacts_dict, args)
+
         return lexical_artifacts_dict
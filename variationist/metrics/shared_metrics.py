@@ -1,15 +1,251 @@
+import concurrent.futures
+import heapq
 import pandas as pd
+import threading
+import weakref
+from collections import Counter
+from tqdm import tqdm
 
+from variationist import utils
+from variationist.metrics.subset_counts import SubsetCounts
 
-def get_all_frequencies(pandas_series):
-    """Returns all token frequencies inside a pandas Series."""
+
+# Number of chunks of subsets each worker is given on average, to balance the load across workers
+CHUNKS_PER_WORKER = 4
+
+# Counts shared across metrics, keyed by the subsets they were computed on (see `get_shared_counts`)
+SHARED_COUNTS_CACHE = dict()
+SHARED_COUNTS_LOCKS = dict()
+SHARED_COUNTS_LOCK = threading.Lock()
+
+# Maximum errors of approximate token frequencies, collected for the metric being calculated by 
+# each thread (see `record_approx_errors`)
+APPROX_ERRORS = threading.local()
+
+
+def get_all_frequencies(pandas_series, vocabulary=None):
+    """Returns all token frequencies inside a pandas Series. If a `vocabulary` (any container 
+    supporting fast membership tests) is given, only the frequencies of its tokens are returned."""
+    if isinstance(pandas_series, SubsetCounts):
+        return pandas_series.get_frequencies(vocabulary)
     freq_dict = dict()
     for sentence in pandas_series:
         if len(sentence) == 0:
             continue
         for token in sentence:
+            if (vocabulary is not None) and (token not in vocabulary):
+                continue
             if token not in freq_dict:
                 freq_dict[token] = 0
             freq_dict[token] += 1
 
-    return freq_dict
\ No newline at end of file
+    return freq_dict
+
+
+def get_overall_frequencies(label_values_dict, subsets_of_interest):
+    """Returns the token frequencies over all the subsets of interest, without storing 
+    per-subset frequencies."""
+    freq_counter = Counter()
+    for column in label_values_dict:
+        for subset in get_subsets(label_values_dict, subsets_of_interest, column):
+            if isinstance(subset, SubsetCounts):
+                freq_counter.update(subset.token_counts)
+                continue
+            for sentence in subset:
+                freq_counter.update(sentence)
+
+    return dict(freq_counter)
+
+
+def get_approx_frequencies(pandas_series, max_counters):
+    """Returns approximate token frequencies inside a pandas Series using the SpaceSaving algorithm
+    (Metwally et al., 2005), which keeps at most `max_counters` tokens in memory regardless of the
+    vocabulary size. All the tokens with a frequency higher than N/max_counters (where N is the 
+    number of tokens in the Series) are guaranteed to be kept. Counts are never lower than the true
+    frequencies, and the count of each token overestimates its true frequency by at most the 
+    associated error (which is in turn at most N/max_counters)."""
+    freq_dict = dict()
+    error_dict = dict()
+    # Min-heap of (count, token) with exactly one entry for each kept token. Counts in the heap 
+    # may be lower than the actual ones (they are lazily updated only when reaching the top)
+    min_heap = []
+    for sentence in pandas_series:
+        if len(sentence) == 0:
+            continue
+        for token in sentence:
+            if token in freq_dict:
+                freq_dict[token] += 1
+            elif len(freq_dict) < max_counters:
+                freq_dict[token] = 1
+                error_dict[token] = 0
+                heapq.heappush(min_heap, (1, token))
+            else:
+                # Find the token with the minimum count, updating outdated heap entries
+                min_count, min_token = min_heap[0]
+                while freq_dict[min_token] != min_count:
+                    heapq.heapreplace(min_heap, (freq_dict[min_token], min_token))
+                    min_count, min_token = min_heap[0]
+                # Replace it with the new token, which inherits its count as error
+                del freq_dict[min_token]
+                del error_dict[min_token]
+                freq_dict[token] = min_count + 1
+                error_dict[token] = min_count
+                heapq.heapreplace(min_heap, (min_count + 1, token))
+
+    return freq_dict, error_dict
+
+
+def get_frequencies(pandas_series, approx_counters=None, vocabulary=None):
+    """Returns the token frequencies inside a pandas Series along with the maximum error on them. 
+    Frequencies are exact (with an error of 0) if `approx_counters` is None, o.w. they are 
+    approximated using at most `approx_counters` counters (see `get_approx_frequencies`). Exact 
+    frequencies can be restricted to the tokens in `vocabulary`. Frequencies from SubsetCounts are 
+    always exact."""
+    if (approx_counters is None) or isinstance(pandas_series, SubsetCounts):
+        return get_all_frequencies(pandas_series, vocabulary), 0
+    freq_dict, error_dict = get_approx_frequencies(pandas_series, approx_counters)
+    max_error = max(error_dict.values()) if len(error_dict) > 0 else 0
+
+    return freq_dict, max_error
+
+
+def report_approx_errors(max_errors, args):
+    """Prints the maximum overestimation of token frequencies across subsets if these have been 
+    counted approximately."""
+    if (args is not None) and (args.approx_counters is not None):
+        max_error = max(max_errors) if len(max_errors) > 0 else 0
+        print(f"INFO: Token frequencies have been approximated using {args.approx_counters} counters "
+            f"per subset. Only the most frequent tokens are kept, and their frequencies overestimate "
+            f"the true ones by at most {max_error} occurrence(s).")
+
+
+def record_approx_errors(max_errors_dict):
+    """Records the maximum overestimation of approximate token frequencies in each subset (keyed 
+    by subset name) for the metric being calculated by the current thread, if these are being 
+    collected (see `metrics.calculate_metric`)."""
+    approx_errors = getattr(APPROX_ERRORS, "errors", None)
+    if approx_errors is not None:
+        approx_errors.update(max_errors_dict)
+
+
+def select_top_k(scores_dict, top_k=None, min_score=None):
+    """Returns a dictionary with the entries of `scores_dict` ordered by descending value.
+    If `min_score` is given, only entries whose value is at least `min_score` are kept. If 
+    `top_k` is given, only the `top_k` highest scoring entries are kept: these are selected 
+    through a heap, thus avoiding to sort the whole dictionary."""
+    items = scores_dict.items()
+    if min_score is not None:
+        items = [(token, value) for token, value in items if value >= min_score]
+    if top_k is not None:
+        selected_items = heapq.nlargest(top_k, items, key=lambda x:x[1])
+    else:
+        selected_items = sorted(items, key=lambda x:x[1], reverse=True)
+
+    return dict(selected_items)
+
+
+def select_top_k_per_label(output_dict, args):
+    """Applies `select_top_k` to the scores of each label in `output_dict` according to the 
+    `top_k` and `min_score` values in the InspectorArgs."""
+    for label in output_dict:
+        output_dict[label] = select_top_k(output_dict[label], args.top_k, args.min_score)
+
+    return output_dict
+
+
+def get_subsets(label_values_dict, subsets_of_interest, column):
+    """Returns the list of subsets (pandas Series) of interest for the given column."""
+    return [subsets_of_interest[column][l] for l in range(len(label_values_dict[column]))]
+
+
+def chunk_subsets(subsets, n_workers):
+    """Splits a list of subsets into consecutive chunks with a similar number of texts, so that 
+    many small subsets are grouped together in the same chunk whereas large ones are not."""
+    total_texts = sum(len(subset) for subset in subsets)
+    target_size = max(1, total_texts // (n_workers * CHUNKS_PER_WORKER))
+
+    chunks, current_chunk, current_size = [], [], 0
+    for subset in subsets:
+        current_chunk.append(subset)
+        current_size += len(subset)
+        if current_size >= target_size:
+            chunks.append(current_chunk)
+            current_chunk, current_size = [], 0
+    if len(current_chunk) > 0:
+        chunks.append(current_chunk)
+
+    return chunks
+
+
+def apply_to_chunk(subset_fn, chunk):
+    """Applies `subset_fn` to each subset in a chunk and returns the list of results."""
+    return [subset_fn(subset) for subset in chunk]
+
+
+def map_subsets(subset_fn, subsets, args=None, progress_bar=True):
+    """Applies `subset_fn` to each subset in `subsets` and returns the results in the same order.
+    If `subset_n_jobs` in the InspectorArgs is not 1, subsets are grouped into chunks of similar 
+    size which are processed by a pool of workers (of the kind defined by `executor`). When using 
+    processes, `subset_fn` must be picklable (e.g., a module-level function or a partial of it)."""
+    n_workers = 1 if (args is None) else utils.get_num_workers(args.subset_n_jobs)
+    n_workers = min(n_workers, len(subsets))
+
+    if n_workers <= 1:
+        return [subset_fn(subset) for subset in tqdm(subsets, disable=not progress_bar)]
+
+    chunks = chunk_subsets(subsets, n_workers)
+    if args.executor == "processes":
+        executor_class = concurrent.futures.ProcessPoolExecutor
+    else:
+        executor_class = concurrent.futures.ThreadPoolExecutor
+    with executor_class(max_workers=n_workers) as executor:
+        chunk_results = list(tqdm(
+            executor.map(apply_to_chunk, [subset_fn] * len(chunks), chunks), 
+            total=len(chunks), disable=not progress_bar))
+
+    return [result for chunk_result in chunk_results for result in chunk_result]
+
+
+def compute_per_subset(label_values_dict, subsets_of_interest, subset_fn, args=None, progress_bar=True):
+    """Returns a dictionary with the result of `subset_fn` for each subset of interest (keyed by 
+    subset name). Subsets are processed in parallel if `subset_n_jobs` is set in the InspectorArgs."""
+    values_dict = dict()
+    for column in label_values_dict:
+        subsets = get_subsets(label_values_dict, subsets_of_interest, column)
+        subsets_values = map_subsets(subset_fn, subsets, args, progress_bar)
+        for subset, values in zip(subsets, subsets_values):
+            values_dict[subset.name] = values
+
+    return values_dict
+
+
+def forget_shared_counts(key):
+    """Removes the shared counts stored under `key` (called when its subsets are discarded)."""
+    SHARED_COUNTS_CACHE.pop(key, None)
+    SHARED_COUNTS_LOCKS.pop(key, None)
+
+
+def get_shared_counts(counts_fn, label_values_dict, subsets_of_interest, *counts_args, args=None):
+    """Returns `counts_fn(label_values_dict, subsets_of_interest, *counts_args, args=args)`, 
+    memoized for as long as the subsets of interest exist. This way, counts needed by several 
+    metrics (e.g., token frequencies for all pmi-based metrics) are computed once for each set 
+    of subsets, also across repeated analyses by the same Inspector. The InspectorArgs `args` 
+    are not part of the key, as they should only affect how counts are computed (e.g., in 
+    parallel), not their values. Concurrent requests for the same counts wait for the first 
+    one to complete. The returned counts must not be modified."""
+    subsets = [subset for column in label_values_dict 
+        for subset in get_subsets(label_values_dict, subsets_of_interest, column)]
+    key = (counts_fn.__module__, counts_fn.__name__, tuple(id(subset) for subset in subsets), counts_args)
+
+    with SHARED_COUNTS_LOCK:
+        key_lock = SHARED_COUNTS_LOCKS.setdefault(key, threading.Lock())
+    with key_lock:
+        if key not in SHARED_COUNTS_CACHE:
+            SHARED_COUNTS_CACHE[key] = counts_fn(
+                label_values_dict, subsets_of_interest, *counts_args, args=args)
+            # Forget the counts as soon as any of the subsets is garbage collected
+            for subset in subsets:
+                weakref.finalize(subset, forget_shared_counts, key)
+        counts = SHARED_COUNTS_CACHE[key]
+
+    return counts
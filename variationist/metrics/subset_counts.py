@@ -0,0 +1,142 @@
+import hashlib
+import math
+from collections import Counter
+
+
+# Name of the per-text statistic storing the length of texts
+TEXT_LENGTH_STAT = "text_len"
+
+
+def get_text_hash(text):
+    """Returns a compact hash of a tokenized text, used to find duplicate texts."""
+    return hashlib.blake2b(" ".join(text).encode("utf-8"), digest_size=8).digest()
+
+
+class SubsetCounts:
+    """
+    The SubsetCounts class. It stores the counts of a subset of tokenized texts which are
+    needed to calculate the built-in metrics (except `lex_art`) without accessing the texts
+    anymore, i.e., token frequencies, number of texts, hashes of texts, and the sums (and
+    sums of squares) of per-text statistics such as text length and lexical diversity scores.
+    Counts can be merged with (or subtracted from) those of other subsets of texts, and can be
+    used in place of a subset (pandas Series) of tokenized texts when calculating metrics.
+
+    Parameters
+    ----------
+    name: `str`
+        The name of the subset (i.e., its label).
+    text_stat_fns: `List`, *optional*
+        A list of functions calculating per-text statistics from the number of tokens and
+        types of a text (e.g., `lexical_variation.ttr_score`). Their sums are stored under the
+        name of the function. The length of texts is always stored.
+    """
+
+    def __init__(self, name, text_stat_fns=[]):
+        """"""
+        self.name = name
+        self.text_stat_fns = list(text_stat_fns)
+        self.num_texts = 0
+        self.token_counts = Counter()
+        self.text_hashes = Counter()
+        self.text_stats = {stat_name: [0, 0.0, 0.0] for stat_name in
+            [TEXT_LENGTH_STAT] + [stat_fn.__name__ for stat_fn in self.text_stat_fns]}
+
+
+    def __len__(self):
+        """Returns the number of texts in the subset."""
+        return self.num_texts
+
+
+    def add_texts(self, texts):
+        """Adds the counts of the given tokenized texts and returns the updated counts."""
+        for text in texts:
+            self.num_texts += 1
+            if len(text) == 0:
+                continue
+            self.token_counts.update(text)
+            self.text_hashes[get_text_hash(text)] += 1
+            tok = len(text)
+            typ = len(set(text))
+            self.add_text_stat(TEXT_LENGTH_STAT, tok)
+            for stat_fn in self.text_stat_fns:
+                self.add_text_stat(stat_fn.__name__, stat_fn(tok, typ))
+
+        return self
+
+
+    def add_text_stat(self, stat_name, value, sign=1):
+        """Adds (or subtracts, if `sign` is -1) a value of a per-text statistic."""
+        stat = self.text_stats[stat_name]
+        stat[0] += sign
+        stat[1] += sign * value
+        stat[2] += sign * value * value
+
+
+    def update(self, other, sign=1):
+        """Merges the counts of another subset into these ones (or subtracts them, if `sign`
+        is -1) and returns the updated counts. Both must store the same per-text statistics."""
+        self.num_texts += sign * other.num_texts
+        if sign == 1:
+            self.token_counts.update(other.token_counts)
+            self.text_hashes.update(other.text_hashes)
+        else:
+            self.token_counts.subtract(other.token_counts)
+            self.text_hashes.subtract(other.text_hashes)
+            # Keep only the tokens (and texts) which are still present
+            self.token_counts = +self.token_counts
+            self.text_hashes = +self.text_hashes
+        for stat_name, (n, total, total_sq) in other.text_stats.items():
+            stat = self.text_stats[stat_name]
+            stat[0] += sign * n
+            stat[1] += sign * total
+            stat[2] += sign * total_sq
+
+        return self
+
+
+    def subtract(self, other):
+        """Subtracts the counts of another subset (which must be included in this one) and
+        returns the updated counts."""
+        return self.update(other, sign=-1)
+
+
+    def copy(self, name=None):
+        """Returns a copy of the counts, optionally with a different name."""
+        subset_counts = SubsetCounts(self.name if name is None else name, self.text_stat_fns)
+        return subset_counts.update(self)
+
+
+    def get_frequencies(self, vocabulary=None):
+        """Returns the token frequencies, restricted to the tokens in `vocabulary` (if given)."""
+        if vocabulary is None:
+            return dict(self.token_counts)
+        return {token: count for token, count in self.token_counts.items() if token in vocabulary}
+
+
+    def get_text_stat(self, stat_name):
+        """Returns the mean and standard deviation of a per-text statistic over the non-empty
+        texts of the subset."""
+        n, total, total_sq = self.text_stats[stat_name]
+        values = dict()
+        values["mean"] = total / n if n > 0 else 0
+        if n < 2:
+            values["stdev"] = 0
+        else:
+            values["stdev"] = math.sqrt(max(0.0, (total_sq - total * total / n) / (n - 1)))
+
+        return values
+
+
+    def get_num_tokens(self):
+        """Returns the total number of tokens."""
+        return sum(self.token_counts.values())
+
+
+    def get_vocab_size(self):
+        """Returns the number of unique tokens."""
+        return len(self.token_counts)
+
+
+    def get_num_duplicates(self):
+        """Returns the number of non-empty texts which duplicate a previous one."""
+        return sum(self.text_hashes.values()) - len(self.text_hashes)
@@ -0,0 +1,205 @@
+"""A python file containing the on-disk cache for the results of computed metrics."""
+
+import hashlib
+import json
+import os
+import pandas as pd
+import pickle
+import shutil
+
+
+# Arguments which do not affect the results of a metric, and thus are not part of cache keys
+NON_RESULT_ARGS = ["metrics", "n_jobs", "subset_n_jobs", "executor", "cache_dir", "cache_max_size"]
+CACHE_FILE_EXT = ".pkl"
+# Suffix of the entries storing the errors of approximate frequencies of a metric (if any)
+APPROX_ERRORS_SUFFIX = ".approx_errors"
+
+
+def get_dataset_fingerprint(
+    dataframe: pd.DataFrame,
+    columns: list,
+) -> str:
+    """
+    A function that computes a fast fingerprint of the given columns of a dataframe,
+    i.e., a hash of their names and values (row by row, including the index).
+
+    Parameters
+    ----------
+    dataframe: `pandas.DataFrame`
+        The dataframe containing the input data.
+    columns: `list`
+        The list of columns (text and variable columns) to be fingerprinted.
+
+    Returns
+    -------
+    fingerprint: `str`
+        The hexadecimal fingerprint of the given columns.
+    """
+
+    hasher = hashlib.sha256()
+    hasher.update(json.dumps([str(column) for column in columns]).encode("utf-8"))
+    hasher.update(pd.util.hash_pandas_object(dataframe[columns], index=True).values.tobytes())
+
+    return hasher.hexdigest()
+
+
+def get_args_fingerprint(
+    args_dict: dict,
+) -> str:
+    """
+    A function that computes a fingerprint of the analysis arguments, excluding those
+    which do not affect the results of metrics (e.g., the number of workers). If custom
+    stopwords are read from a file, the content of the file is part of the fingerprint,
+    so that results are computed again whenever the file changes.
+
+    Parameters
+    ----------
+    args_dict: `dict`
+        The dictionary of arguments, as returned by `InspectorArgs.to_dict()`.
+
+    Returns
+    -------
+    fingerprint: `str`
+        The hexadecimal fingerprint of the arguments.
+    """
+
+    result_args_dict = {key: value for key, value in args_dict.items() if key not in NON_RESULT_ARGS}
+    custom_stopwords = result_args_dict.get("custom_stopwords")
+    if (type(custom_stopwords) is str) and os.path.isfile(custom_stopwords):
+        with open(custom_stopwords, "rb") as f:
+            result_args_dict["custom_stopwords_hash"] = hashlib.sha256(f.read()).hexdigest()
+    args_string = json.dumps(result_args_dict, sort_keys=True, default=str)
+
+    return hashlib.sha256(args_string.encode("utf-8")).hexdigest()
+
+
+class ResultsCache:
+    """
+    An on-disk cache for the results of computed metrics. Entries are stored at the metric
+    level, one file per metric, under a folder for each dataset fingerprint. Whenever the
+    total size of the cache exceeds `max_size` megabytes, the least recently used entries
+    are evicted.
+
+    Parameters
+    ----------
+    cache_dir: `str`
+        The path to the folder in which cached results are stored.
+    max_size: `int`, *optional*
+        The maximum size of the cache folder in megabytes. Defaults to None (no limit).
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        max_size: int = None,
+    ):
+        """"""
+
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+
+    def get_entry_path(self, dataset_fingerprint, args_fingerprint, metric_name):
+        """Returns the path of the cache entry for the given fingerprints and metric."""
+
+        return os.path.join(self.cache_dir, dataset_fingerprint,
+            f"{metric_name}__{args_fingerprint}{CACHE_FILE_EXT}")
+
+
+    def get(self, dataset_fingerprint, args_fingerprint, metric_name):
+        """Returns the cached result for the given fingerprints and metric, or None if it is
+        not in the cache. Reading an entry marks it as recently used."""
+
+        entry_path = self.get_entry_path(dataset_fingerprint, args_fingerprint, metric_name)
+        try:
+            with open(entry_path, "rb") as f:
+                result = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        os.utime(entry_path)
+
+        return result
+
+
+    def put(self, dataset_fingerprint, args_fingerprint, metric_name, result):
+        """Stores the result for the given fingerprints and metric, then evicts the least
+        recently used entries if the cache exceeds its maximum size."""
+
+        entry_path = self.get_entry_path(dataset_fingerprint, args_fingerprint, metric_name)
+        os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+
+        # Write to a temporary file first, so that concurrent readers never see partial entries
+        tmp_path = f"{entry_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, entry_path)
+
+        self.evict()
+
+
+    def get_entries(self):
+        """Returns a list of (path, size, last access time) tuples for all cache entries."""
+
+        entries = []
+        for root, _, filenames in os.walk(self.cache_dir):
+            for filename in filenames:
+                if filename.endswith(CACHE_FILE_EXT):
+                    entry_path = os.path.join(root, filename)
+                    try:
+                        stat = os.stat(entry_path)
+                    except OSError:
+                        continue
+                    entries.append((entry_path, stat.st_size, stat.st_mtime))
+
+        return entries
+
+
+    def evict(self):
+        """Removes the least recently used entries until the cache fits its maximum size."""
+
+        if self.max_size is None:
+            return
+
+        max_bytes = self.max_size * 1024 * 1024
+        entries = sorted(self.get_entries(), key=lambda x: x[2])
+        total_bytes = sum(size for _, size, _ in entries)
+        for entry_path, size, _ in entries:
+            if total_bytes <= max_bytes:
+                break
+            try:
+                os.remove(entry_path)
+            except OSError:
+                continue
+            total_bytes -= size
+
+
+    def invalidate(self, dataset_fingerprint=None, metric_names=None):
+        """
+        Removes entries from the cache.
+
+        Parameters
+        ----------
+        dataset_fingerprint: `str`, *optional*
+            If set, only entries for the dataset with this fingerprint are removed.
+        metric_names: `list`, *optional*
+            If set, only entries for these metrics are removed.
+        """
+
+        if (dataset_fingerprint is None) and (metric_names is None):
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            return
+
+        for entry_path, _, _ in self.get_entries():
+            entry_dataset = os.path.basename(os.path.dirname(entry_path))
+            entry_metric = os.path.basename(entry_path).rsplit("__", 1)[0]
+            if (dataset_fingerprint is not None) and (entry_dataset != dataset_fingerprint):
+                continue
+            if (metric_names is not None) and (entry_metric not in metric_names) and (
+                entry_metric.removesuffix(APPROX_ERRORS_SUFFIX) not in metric_names):
+                continue
+            try:
+                os.remove(entry_path)
+            except OSError:
+                continue
@@ -1,17 +1,125 @@
 """A python file containing project-wide constants and functions."""
 
+import bz2
 import csv
 import emoji
+import gzip
+import heapq
 import json
+import lzma
 import os
 import pandas as pd
-from typing import Union
+import pickle
+import pyarrow.feather
+from typing import Any, Optional, Union
 
 
 # CONSTANTS
 TEXT_COLS_KEY = "text"
 LABEL_COLS_KEY = "labels"
 MULTI_VAR_SEP = "::"
+COMPRESSION_OPENERS = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open}
+BINARY_EXTENSIONS = [".pkl", ".pickle"]
+RESULTS_METADATA_FILENAME = "metadata.json"
+TABLE_FORMATS_EXTENSIONS = {"parquet": ".parquet", "arrow": ".arrow"}
+LONG_FORM_KEY = "long_form"
+
+
+def open_output_file(
+    filepath: str,
+    mode: str = "r",
+):
+    """
+    A function that opens a file in text mode (or binary mode, if "b" is in `mode`), 
+    transparently (de)compressing it if its extension is ".gz", ".bz2", or ".xz".
+
+    Parameters
+    ----------
+    filepath: `str`
+        The path to the file.
+    mode: `str`
+        The mode in which the file is opened (e.g., "r", "w", "rb", "wb").
+
+    Returns
+    -------
+    file: `file object`
+        The opened file.
+    """
+
+    extension = os.path.splitext(filepath)[1].lower()
+    if "b" not in mode:
+        mode = f"{mode}t"
+    if extension in COMPRESSION_OPENERS:
+        if "b" in mode:
+            return COMPRESSION_OPENERS[extension](filepath, mode)
+        return COMPRESSION_OPENERS[extension](filepath, mode, encoding="utf-8")
+    if "b" in mode:
+        return open(filepath, mode)
+    return open(filepath, mode.replace("t", ""), encoding="utf-8")
+
+
+def is_binary_filepath(
+    filepath: str,
+) -> bool:
+    """A function that returns whether a (possibly compressed) file is a binary (pickle) 
+    output file, based on its extension (e.g., "output.pkl" or "output.pkl.gz")."""
+
+    root, extension = os.path.splitext(filepath.lower())
+    if extension in COMPRESSION_OPENERS:
+        extension = os.path.splitext(root)[1]
+    return extension in BINARY_EXTENSIONS
+
+
+def dump_json_stream(
+    obj,
+    output_file,
+    indent: int = None,
+    max_depth: int = 4,
+    level: int = 0,
+) -> None:
+    """
+    A function that writes an object as json to an open file incrementally: dictionaries 
+    up to `max_depth` levels are written key by key, whereas deeper values are serialized 
+    one at a time. This avoids building the whole json string in memory. With `indent` set 
+    to None, the output is compact; otherwise, it is the same as `json.dump(obj, indent=indent)`.
+
+    Parameters
+    ----------
+    obj: `Any`
+        The json-serializable object to be written.
+    output_file: `file object`
+        The file opened in text mode.
+    indent: `int`, *optional*
+        The indentation level. If None, the most compact representation is used.
+    max_depth: `int`
+        The number of levels of dictionaries which are written key by key.
+    level: `int`
+        The current level (used for indentation).
+    """
+
+    if (not isinstance(obj, dict)) or (len(obj) == 0) or (level >= max_depth):
+        if indent is None:
+            output_file.write(json.dumps(obj, separators=(",", ":")))
+        else:
+            # Nested lines are indented relative to the current level
+            output_file.write(json.dumps(obj, indent=indent).replace("\n", "\n" + " " * (indent * level)))
+        return
+
+    if indent is None:
+        item_sep, key_sep, newline, closing = ",", ":", "", ""
+    else:
+        item_sep, key_sep = ",", ": "
+        newline = "\n" + " " * (indent * (level + 1))
+        closing = "\n" + " " * (indent * level)
+    output_file.write("{")
+    for i, (key, value) in enumerate(obj.items()):
+        if i > 0:
+            output_file.write(item_sep)
+        # Non-string keys are converted as json does (e.g., 1 becomes "1" and True becomes "true")
+        json_key = key if isinstance(key, str) else json.dumps(key)
+        output_file.write(newline + json.dumps(json_key) + key_sep)
+        dump_json_stream(value, output_file, indent, max_depth, level + 1)
+    output_file.write(closing + "}")
 
 
 def load_json_data_from_filepath_or_dict(
@@ -19,7 +127,9 @@ def load_json_data_from_filepath_or_dict(
 ) -> dict:
     """
     A function that loads the json/dict object from either a user-defined json 
-    filepath or a dict variable (in the latter case, it returns the dict itself).
+    filepath or a dict variable (in the latter case, it returns the dict itself). Json 
+    files may be compressed (".gz", ".bz2", or ".xz"), and binary outputs (".pkl") are 
+    also supported.
 
     Parameters
     ----------
@@ -33,10 +143,15 @@ def load_json_data_from_filepath_or_dict(
         A json/dict object storing metadata and results of a prior analysis.
     """
 
-    # If the input is a json filepath, read it and store it
+    # If the input is a json filepath, read it and store it (it may also be compressed or binary)
     if type(input_json) == str:
         print(f"Loading json data from the filepath \"{input_json}\"...")
-        json_data = json.load(open(input_json))
+        if is_binary_filepath(input_json):
+            with open_output_file(input_json, "rb") as input_file:
+                json_data = pickle.load(input_file)
+        else:
+            with open_output_file(input_json, "r") as input_file:
+                json_data = json.load(input_file)
     # If the input is already a json/dict object, use it
     elif type(input_json) == dict:
         print(f"Reading json data...")
@@ -48,6 +163,31 @@ def load_json_data_from_filepath_or_dict(
     return json_data
 
 
+def get_num_workers(n_jobs):
+    """A function that returns the number of workers to use given the user-defined `n_jobs`. A value 
+    of None is treated as 1 (no parallelism), whereas a value lower than or equal to 0 means that all 
+    the available CPUs are used.
+
+    Parameters
+    ----------
+    n_jobs: int
+        The number of parallel jobs as requested by the user.
+
+    Returns
+    -------
+    num_workers: int
+        The actual number of workers to use.
+    """
+    if n_jobs is None:
+        num_workers = 1
+    elif n_jobs <= 0:
+        num_workers = os.cpu_count() or 1
+    else:
+        num_workers = n_jobs
+
+    return num_workers
+
+
 def convert_file_to_dataframe(data_filepath, cols_type):
     """A function that, given an input filepath and information about the columns type (i.e., names or
     indexes), checks the format the file (csv, tsv, or other), reads it, and stores it in a pandas 
@@ -192,3 +332,279 @@ def replace_symbols(text):
 
     return temp_text
 
+
+def get_long_form_df(
+    json_data: dict[str, Any],
+    var_names_concat: str,
+    focus_ngrams: Optional[list[str]] = None,
+    top_per_class_ngrams: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    A function that returns a long-form dataframe (one row for each variable value(s), 
+    n-gram, and value) from the results of a metric. Optionally, it takes a list of n-grams 
+    to focus the filtering on, and the number of highest scoring n-grams to keep for each 
+    variable value(s), which are selected before building the dataframe.
+
+    Parameters
+    ----------
+    json_data: dict[str, Any]
+        The results of a metric in the form: {var_names_concat: {varA: {ngram1: value1, 
+        ngram2: value2, ...}, varB: {...}, ...}}. Note that varA, varB, etc. could also 
+        take the form of "::"-concatenated variable values if multiple variables are 
+        present in the analysis.
+    var_names_concat: str
+        A string denoting the ordered concatenation of variable names (i.e., original 
+        column names), separated by MULTI_VAR_SEP, to be used for naming the columns.
+    focus_ngrams: list[str], *optional*, defaults to `None`
+        A list of n-grams of interest to focus the filtering on.
+    top_per_class_ngrams: int, *optional*, defaults to `None`
+        The number of highest scoring n-grams to keep for each variable value(s), including 
+        ties (see get_top_items()). If None, all of the n-grams are kept.
+
+    Returns
+    -------
+    df_data: pd.DataFrame
+        A long-form dataframe with a column for each variable, and "ngram" and "value" columns.
+    """
+
+    # Initialize the lists for variables, ngrams, and values
+    variables, ngrams, values = dict(), [], []
+
+    # Get the individual variables and initialize each of them
+    var_names = var_names_concat.split(MULTI_VAR_SEP)
+    for var_name in var_names:
+        variables[var_name] = []
+
+    # Use a set for fast lookups of the n-grams of interest
+    if focus_ngrams != None:
+        focus_ngrams = set(focus_ngrams)
+
+    # Iterate through variable values and keep the ngram-value pairs of interest
+    for variable, raw_items in json_data[var_names_concat].items():
+        if focus_ngrams != None:
+            raw_items = {ngram: value for ngram, value in raw_items.items() if ngram in focus_ngrams}
+        if top_per_class_ngrams != None:
+            raw_items = get_top_items(raw_items, top_per_class_ngrams)
+
+        # Split the variable values only once for all the n-grams of the label
+        num_items = len(raw_items)
+        variable_values = str(variable).split(MULTI_VAR_SEP)
+        for i in range(len(var_names)):
+            variables[var_names[i]].extend([variable_values[i]] * num_items)
+        ngrams.extend(raw_items.keys())
+        values.extend(raw_items.values())
+
+    # Create the long-form dataframe
+    dict_data = variables
+    dict_data["ngram"] = ngrams
+    dict_data["value"] = values
+    df_data = pd.DataFrame(dict_data)
+
+    return df_data
+
+
+def get_top_items(
+    items: dict[str, Any],
+    top_k: int,
+) -> dict[str, Any]:
+    """
+    A function that returns the ngram-value pairs with the top_k highest values, including 
+    all of those tied with the k-th highest value and those with a missing value (so that 
+    ranking them afterwards in charts gives the same result as on all pairs).
+
+    Parameters
+    ----------
+    items: dict[str, Any]
+        A dictionary of ngram-value pairs.
+    top_k: int
+        The number of highest values to keep.
+
+    Returns
+    -------
+    top_items: dict[str, Any]
+        A dictionary of the top ngram-value pairs, in the original order.
+    """
+
+    numeric_values = [value for value in items.values() if (value is not None) and (value == value)]
+    if len(numeric_values) <= top_k:
+        return items
+
+    min_value = heapq.nlargest(top_k, numeric_values)[-1]
+    return {ngram: value for ngram, value in items.items() if 
+        (value is None) or (value != value) or (value >= min_value)}
+
+
+def get_top_per_class_df(
+    df_data: pd.DataFrame,
+    top_k: int,
+) -> pd.DataFrame:
+    """
+    A function that keeps the rows of a long-form dataframe with the top_k highest values for 
+    each variable value(s), including ties and missing values (see get_top_items()).
+
+    Parameters
+    ----------
+    df_data: pd.DataFrame
+        A long-form dataframe with a column for each variable, and "ngram" and "value" columns.
+    top_k: int
+        The number of highest values to keep for each variable value(s).
+
+    Returns
+    -------
+    df_data: pd.DataFrame
+        The filtered long-form dataframe.
+    """
+
+    var_columns = list(df_data.columns[:-2])
+    ranks = df_data.groupby(var_columns, sort=False)["value"].rank(method="min", ascending=False)
+    is_top = (ranks <= top_k) | df_data["value"].isna()
+
+    return df_data[is_top].reset_index(drop=True)
+
+
+def get_stats_long_form_df(
+    json_data: dict[str, Any],
+    var_names_concat: str,
+) -> pd.DataFrame:
+    """
+    A function that returns a long-form dataframe from the results of basic statistics. 
+    This is a variant of get_long_form_df() to handle basic stats.
+
+    Parameters
+    ----------
+    json_data: dict[str, Any]
+        The results of basic statistics in the form: {substatA: {colnameA: {varA: value1, 
+        ...}, ...}, substatB: {colnameA: {varA: {"mean": value, "stdev": value}, ...}, ...}, 
+        ...}. Note that varA, varB, etc. could also take the form of "::"-concatenated 
+        variable values if multiple variables are present in the analysis.
+    var_names_concat: str
+        A string denoting the ordered concatenation of variable names (i.e., original 
+        column names), separated by MULTI_VAR_SEP, to be used for naming the columns.
+
+    Returns
+    -------
+    df_data: pd.DataFrame
+        A long-form dataframe with a column for each variable, and "statistics", "val_1", 
+        and "val_2" columns.
+    """
+
+    # Initialize the lists for variables, submetrics, and values
+    variables, submetric_list, val_1_list, val_2_list = dict(), [], [], []
+
+    # Get the individual variables and initialize each of them
+    var_names = var_names_concat.split(MULTI_VAR_SEP)
+    for var_name in var_names:
+        variables[var_name] = []
+
+    # Iterate through the dictionary to create lists for creating the dataframe
+    for submetric, vars_label_vals in json_data.items():
+        for raw_vars, label_vals in vars_label_vals.items():
+            for label, vals in label_vals.items():
+                is_vals_dict = (type(vals)==dict)
+                if is_vals_dict:
+                    val_1, val_2 = vals["mean"], vals["stdev"]
+                else:
+                    val_1, val_2 = vals, None
+
+                for i in range(len(var_names)):
+                    variables[var_names[i]].append(str(label).split(MULTI_VAR_SEP)[i])
+                submetric_list.append(submetric)
+                val_1_list.append(val_1)
+                val_2_list.append(val_2)
+
+    # Create the long-form dataframe
+    dict_data = variables
+    dict_data["statistics"] = submetric_list
+    dict_data["val_1"] = val_1_list
+    dict_data["val_2"] = val_2_list
+    df_data = pd.DataFrame(dict_data)
+
+    return df_data
+
+
+def get_metric_long_form_df(
+    metric: str,
+    metric_results: dict[str, Any],
+) -> pd.DataFrame:
+    """
+    A function that returns the long-form dataframe for the results of a metric, as stored 
+    in the output of an analysis (i.e., using the variable names of the results as columns).
+
+    Parameters
+    ----------
+    metric: str
+        The name of the metric.
+    metric_results: dict[str, Any]
+        The results of the metric.
+
+    Returns
+    -------
+    df_data: pd.DataFrame
+        The long-form dataframe (see get_long_form_df() and get_stats_long_form_df()).
+    """
+
+    if metric == "stats":
+        var_names_concat = next(iter(metric_results["num_texts"]))
+        return get_stats_long_form_df(metric_results, var_names_concat)
+
+    var_names_concat = next(iter(metric_results))
+    return get_long_form_df(metric_results, var_names_concat)
+
+
+def save_long_form_df(
+    df_data: pd.DataFrame,
+    filepath: str,
+    table_format: str = "parquet",
+) -> None:
+    """
+    A function that saves a long-form dataframe as a columnar table, either in the Parquet 
+    ("parquet") or in the Arrow IPC ("arrow") format.
+
+    Parameters
+    ----------
+    df_data: pd.DataFrame
+        The long-form dataframe.
+    filepath: str
+        The path to the output file.
+    table_format: str
+        The format of the table, either "parquet" (default) or "arrow".
+    """
+
+    if table_format == "parquet":
+        df_data.to_parquet(filepath, index=False)
+    elif table_format == "arrow":
+        pyarrow.feather.write_feather(df_data, filepath)
+    else:
+        raise ValueError(f"ERROR: The table format should be one of {list(TABLE_FORMATS_EXTENSIONS.keys())}, but got \"{table_format}\".")
+
+
+def load_long_form_df(
+    filepath: str,
+    focus_ngrams: Optional[list[str]] = None,
+) -> pd.DataFrame:
+    """
+    A function that loads a long-form dataframe from a columnar table in the Parquet or 
+    Arrow IPC format (based on the file extension). Optionally, only the rows for the 
+    n-grams of interest are read.
+
+    Parameters
+    ----------
+    filepath: str
+        The path to the table file.
+    focus_ngrams: list[str], *optional*, defaults to `None`
+        A list of n-grams of interest to focus the filtering on.
+
+    Returns
+    -------
+    df_data: pd.DataFrame
+        The long-form dataframe.
+    """
+
+    if filepath.endswith(TABLE_FORMATS_EXTENSIONS["parquet"]):
+        filters = None if (focus_ngrams is None) else [("ngram", "in", list(focus_ngrams))]
+        return pd.read_parquet(filepath, filters=filters)
+
+    df_data = pyarrow.feather.read_feather(filepath)
+    if focus_ngrams is not None:
+        df_data = df_data[df_data["ngram"].isin(focus_ngrams)].reset_index(drop=True)
+    return df_data
@@ -1,8 +1,10 @@
 import altair as alt
 import functools
+import json
 import operator
 import os
 import pandas as pd
+import threading
 import vl_convert as vlc
 
 from typing import Union, Optional
@@ -10,6 +12,14 @@ from typing import Union, Optional
 from variationist.visualization.chart import Chart
 
 
+# Extension of the files storing the data of HTML charts (if external_data is set)
+EXTERNAL_DATA_EXT = ".json"
+
+# Lock held while serializing charts, since altair data transformers are global state which
+# is temporarily changed (and then restored) during serialization, e.g., by chart.save()
+ALTAIR_DATA_LOCK = threading.RLock()
+
+
 class AltairChart(Chart):
     """A base class for building an alt.Chart chart object."""
 
@@ -44,7 +54,11 @@ class AltairChart(Chart):
         super().__init__(
             df_data, chart_metric, metadata, extra_args, zoomable)
 
-        # alt.data_transformers.enable("vegafusion")
+        # Whether chart transforms should be executed in Python (using VegaFusion) on saving
+        self.server_side_transforms = extra_args.get("server_side_transforms", False)
+
+        # Whether the data of HTML charts should be saved to external files referenced by URL
+        self.external_data = extra_args.get("external_data", False)
 
         # Create the base chart object which stores the data
         self.base_chart = self.create_base_chart(df_data)
@@ -74,6 +88,51 @@ class AltairChart(Chart):
         return base_chart
 
 
+    def filter_top_per_group(
+        self,
+        df_data: pd.core.frame.DataFrame,
+        value_name: str,
+        ngram_name: str,
+        group_name: str,
+        top_k: Optional[int] = None,
+    ) -> pd.core.frame.DataFrame:
+        """
+        A function that returns only the rows of the data which are kept by the ranking 
+        window and filter of a chart, i.e., the top_k highest values for each group (with 
+        ties broken by n-gram). This way, the data embedded in the chart are sized by what 
+        is shown rather than by the vocabulary. The search component is not affected, as it
+        only highlights n-grams among the shown ones.
+
+        Parameters
+        ----------
+        df_data: pd.core.frame.DataFrame
+            A long-form dataframe storing the results of a prior analysis for a
+            given metric that will be used for visualization purposes.
+        value_name: str
+            The name of the column storing the values used for ranking.
+        ngram_name: str
+            The name of the column storing the n-grams (used for breaking ties).
+        group_name: str
+            The name of the column storing the groups in which n-grams are ranked.
+        top_k: Optional[int] = None
+            The maximum number of highest scoring n-grams for each group. If set to None,
+            all the rows are kept.
+
+        Returns
+        -------
+        df_data: pd.core.frame.DataFrame
+            The rows of the dataframe which are shown in the chart, in the original order.
+        """
+
+        if top_k is None:
+            return df_data
+
+        df_sorted = df_data.sort_values(
+            [value_name, ngram_name], ascending=[False, True], kind="stable")
+
+        return df_sorted.groupby(group_name, sort=False).head(top_k).sort_index()
+
+
     def add_search_component(
         self,
         base_chart: alt.Chart,
@@ -298,6 +357,132 @@ class AltairChart(Chart):
         return var_name, var_type_
 
 
+    def get_static_spec(
+        self,
+    ) -> tuple[str, str]:
+        """
+        A function that serializes the chart specification to be converted to static 
+        formats. If server-side transforms are enabled, the transforms (e.g., ranking 
+        windows, filters, and lookups) are first executed in Python using VegaFusion, and 
+        the resulting Vega specification (embedding only the transformed data) is returned.
+
+        Returns
+        -------
+        spec_mode: str
+            The language of the specification, i.e., "vegalite" or "vega".
+        spec_json: str
+            The serialized specification.
+        """
+
+        with ALTAIR_DATA_LOCK:
+            if self.server_side_transforms == True:
+                with alt.data_transformers.enable("vegafusion"):
+                    return "vega", self.chart.to_json(format="vega")
+
+            return "vegalite", self.chart.to_json()
+
+
+    def convert_chart(
+        self,
+        static_spec: tuple[str, str],
+        output_format: str,
+    ) -> Union[str, bytes]:
+        """
+        A function that converts a serialized chart specification to a static format using
+        vl_convert.
+
+        Parameters
+        ----------
+        static_spec: tuple[str, str]
+            The language of the specification and the specification itself, as returned by
+            get_static_spec().
+        output_format: str
+            The static format, i.e., "pdf", "svg", or "png".
+
+        Returns
+        -------
+        output_data: Union[str, bytes]
+            The raw data of the converted chart.
+        """
+
+        spec_mode, spec_json = static_spec
+
+        return getattr(vlc, f"{spec_mode}_to_{output_format}")(spec_json)
+
+
+    def get_spec_with_data_urls(
+        self,
+        spec: Union[dict, list],
+        dataset_names: set[str],
+    ) -> Union[dict, list]:
+        """
+        A function that returns a copy of a (part of a) chart specification in which the 
+        references to the given named datasets are replaced by the URLs of their files.
+
+        Parameters
+        ----------
+        spec: Union[dict, list]
+            The (part of the) vega-lite specification of the chart.
+        dataset_names: set[str]
+            The names of the datasets which are saved to external files.
+
+        Returns
+        -------
+        spec: Union[dict, list]
+            The specification referencing datasets by URL.
+        """
+
+        if isinstance(spec, dict):
+            # Named data may also define a format (e.g., for topojson data)
+            if (set(spec.keys()) <= {"name", "format"}) and (spec.get("name") in dataset_names):
+                return {"url": spec["name"] + EXTERNAL_DATA_EXT, 
+                    **{key: value for key, value in spec.items() if key != "name"}}
+            return {key: self.get_spec_with_data_urls(value, dataset_names) for key, value in spec.items()}
+        if isinstance(spec, list):
+            return [self.get_spec_with_data_urls(value, dataset_names) for value in spec]
+
+        return spec
+
+
+    def save_html_with_external_data(
+        self,
+        output_filepath: str,
+    ) -> None:
+        """
+        A function that saves the chart to an HTML file whose data are stored in compact 
+        json files in the same folder and referenced by URL from the chart. Datasets are 
+        named by their content, so charts sharing the same data (e.g., charts for the same 
+        metric) share the same file, which is written only once.
+
+        Parameters
+        ----------
+        output_filepath: str
+            The path to the HTML file.
+        """
+
+        with ALTAIR_DATA_LOCK, alt.data_transformers.disable_max_rows():
+            spec = self.chart.to_dict()
+        datasets = spec.pop("datasets", {})
+
+        # Write the data files which do not exist yet
+        output_folder = os.path.dirname(output_filepath)
+        for dataset_name, values in datasets.items():
+            data_filepath = os.path.join(output_folder, dataset_name + EXTERNAL_DATA_EXT)
+            if not os.path.exists(data_filepath):
+                # Write to a temporary file first, so that charts never reference partial files
+                tmp_filepath = f"{data_filepath}.{os.getpid()}.{id(self)}.tmp"
+                with open(tmp_filepath, "w") as f:
+                    json.dump(values, f, separators=(",", ":"))
+                os.replace(tmp_filepath, data_filepath)
+
+        # Write the HTML file referencing data files by URL
+        spec = self.get_spec_with_data_urls(spec, set(datasets.keys()))
+        html = alt.utils.spec_to_html(spec, mode="vega-lite", vega_version=alt.VEGA_VERSION, 
+            vegaembed_version=alt.VEGAEMBED_VERSION, vegalite_version=alt.VEGALITE_VERSION)
+        with open(output_filepath, "w") as f:
+            f.write(html)
+
+
     def save(
         self,
         output_folder: str,
@@ -332,13 +517,25 @@ class AltairChart(Chart):
             if "html" in output_formats:
                 output_filepath = os.path.join(output_folder, chart_name + ".html")
                 print(f"INFO: Saving it to the filepath: \"{output_filepath}\".")
-                self.chart.save(output_filepath)
+                if self.server_side_transforms == True:
+                    with ALTAIR_DATA_LOCK, alt.data_transformers.enable("vegafusion"):
+                        self.chart.save(output_filepath)
+                elif self.external_data == True:
+                    self.save_html_with_external_data(output_filepath)
+                else:
+                    with ALTAIR_DATA_LOCK:
+                        self.chart.save(output_filepath)
+
+            # The specification is serialized (only once) for the static formats
+            static_spec = None
 
             # Save the chart to a PDF file in the output folder
             if "pdf" in output_formats:
                 try:
                     # Get the raw data from the chart (it requires "vl_convert" to be installed)
-                    pdf_data = vlc.vegalite_to_pdf(self.chart.to_json())
+                    if static_spec is None:
+                        static_spec = self.get_static_spec()
+                    pdf_data = self.convert_chart(static_spec, "pdf")
 
                     # Write the raw data to the output filepath
                     output_filepath = os.path.join(output_folder, chart_name + ".pdf")
@@ -353,7 +550,9 @@ class AltairChart(Chart):
             if "svg" in output_formats:
                 try:
                     # Get the raw data from the chart (it requires "vl_convert" to be installed)
-                    svg_data = vlc.vegalite_to_svg(self.chart.to_json())
+                    if static_spec is None:
+                        static_spec = self.get_static_spec()
+                    svg_data = self.convert_chart(static_spec, "svg")
 
                     # Write the raw data to the output filepath
                     output_filepath = os.path.join(output_folder, chart_name + ".svg")
@@ -368,7 +567,9 @@ class AltairChart(Chart):
             if "png" in output_formats:
                 try:
                     # Get the raw data from the chart (it requires "vl_convert" to be installed)
-                    png_data = vlc.vegalite_to_png(self.chart.to_json())
+                    if static_spec is None:
+                        static_spec = self.get_static_spec()
+                    png_data = self.convert_chart(static_spec, "png")
 
                     # Write the raw data to the output filepath
                     output_filepath = os.path.join(output_folder, chart_name + ".png")
@@ -1,16 +1,12 @@
 import altair as alt
-import geopandas as gpd
 import os
 import pandas as pd
 
 from typing import Optional
 
+from variationist.visualization import geo_utils
 from variationist.visualization.altair_chart import AltairChart
 
-# Speed up vector-based spatial data processing
-# See: https://geopandas.org/en/stable/docs/user_guide/io.html#reading-spatial-data
-gpd.options.io_engine = "pyogrio"
-
 
 class BinnedGeoChart(AltairChart):
     """A class for building a BinnedGeoChart object."""
@@ -79,7 +75,11 @@ class BinnedGeoChart(AltairChart):
             raise ValueError(f"ERROR. The filepath for the shapefile \"{self.shapefile_path}\" does not exist.\n")
 
         # Load the shapefile and transform geometries to a standard coordinate reference system
-        gdf = gpd.read_file(self.shapefile_path).to_crs("epsg:4286")
+        # (shapefiles are only loaded once, and their geometries are optionally simplified and
+        # embedded as a quantized topology)
+        geo_data = geo_utils.get_shapefile_data(self.shapefile_path, 
+            extra_args.get("shapefile_tolerance"), extra_args.get("shapefile_cache_dir"), 
+            extra_args.get("shapefile_quantization", 10000))
 
         # Get the shapefile min/max for each dimension
         # gdf_min_x, gdf_min_y, gdf_max_x, gdf_max_y = gdf.total_bounds
@@ -91,7 +91,7 @@ class BinnedGeoChart(AltairChart):
         bin_height = chart_base_size / num_lat_bins * 0.95 # @TODO: Workaround, to test to many scenarios
 
         # Set background chart style
-        background = alt.Chart(gdf).mark_geoshape(
+        background = alt.Chart(geo_data).mark_geoshape(
             stroke="white", strokeWidth=0.5, fill="#e1e7e3")
 
         # Set base chart style
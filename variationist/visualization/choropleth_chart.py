@@ -1,16 +1,12 @@
 import altair as alt
-import geopandas as gpd
 import os
 import pandas as pd
 
 from typing import Optional
 
+from variationist.visualization import geo_utils
 from variationist.visualization.altair_chart import AltairChart
 
-# Speed up vector-based spatial data processing
-# See: https://geopandas.org/en/stable/docs/user_guide/io.html#reading-spatial-data
-gpd.options.io_engine = "pyogrio"
-
 
 class ChoroplethChart(AltairChart):
     """A class for building a ChoroplethChart object."""
@@ -78,7 +74,9 @@ class ChoroplethChart(AltairChart):
                 f"ERROR. The filepath for the shapefile \"{self.shapefile_path}\" does not exist.\n")
 
         # Load the shapefile and transform geometries to a standard coordinate reference system
-        gdf = gpd.read_file(self.shapefile_path).to_crs("epsg:4286")
+        # (shapefiles are only loaded once, and their geometries are optionally simplified)
+        gdf = geo_utils.load_shapefile(self.shapefile_path, 
+            extra_args.get("shapefile_tolerance"), extra_args.get("shapefile_cache_dir"))
 
         # Check if the specified column "shapefile_var_name" exists in the geodataframe
         # If not, warn the user, give them the available options, and exit
@@ -102,8 +100,16 @@ class ChoroplethChart(AltairChart):
                 f"\tArea names without a match: {', '.join(variable_values_not_matched)}.\n",
                 f"\tArea names from the shapefile: {', '.join(variable_values_gdf)}.\n")
 
+        # Get the geometries to be embedded once and shared by the background and the lookup
+        # (by default, as a quantized topology in which the shared borders are stored once)
+        quantization = extra_args.get("shapefile_quantization", 10000)
+        geo_data = geo_utils.get_shapefile_data(self.shapefile_path, 
+            extra_args.get("shapefile_tolerance"), extra_args.get("shapefile_cache_dir"), 
+            quantization, [self.shapefile_var_name])
+        geo_key = self.shapefile_var_name if quantization is None else "properties." + self.shapefile_var_name
+
         # Set background chart style
-        background = alt.Chart(gdf).mark_geoshape(
+        background = alt.Chart(geo_data).mark_geoshape(
             stroke="white", strokeWidth=0.5, fill="#e1e7e3")
 
         # Set base chart style
@@ -114,8 +120,8 @@ class ChoroplethChart(AltairChart):
         self.base_chart = self.base_chart.transform_lookup(
             lookup = color_name,
             from_ = alt.LookupData(
-                data = gdf,
-                key = self.shapefile_var_name,
+                data = geo_data,
+                key = geo_key,
                 fields = ["geometry", "type"]
             )
         )
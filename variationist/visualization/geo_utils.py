@@ -0,0 +1,435 @@
+import altair as alt
+import geopandas as gpd
+import hashlib
+import json
+import os
+import shapely
+import threading
+
+from typing import Optional, Union
+
+# Speed up vector-based spatial data processing
+# See: https://geopandas.org/en/stable/docs/user_guide/io.html#reading-spatial-data
+gpd.options.io_engine = "pyogrio"
+
+
+# The standard coordinate reference system to which geometries are transformed
+GEO_CRS = "epsg:4286"
+
+# Shapefiles already loaded by the current process, keyed by get_shapefile_key()
+SHAPEFILES_CACHE = {}
+SHAPEFILES_LOCK = threading.Lock()
+SHAPEFILES_CACHE_EXT = ".parquet"
+
+# Name of the object storing the geometries of a shapefile in its TopoJSON topology
+TOPOLOGY_OBJECT_NAME = "areas"
+
+# Topologies already computed by the current process, keyed by shapefile and encoding options
+TOPOLOGIES_CACHE = {}
+
+
+def get_shapefile_key(
+    shapefile_path: str,
+    simplify_tolerance: Optional[float] = None,
+) -> str:
+    """
+    A function that returns the key identifying a loaded shapefile, i.e., a hash of its
+    absolute path, the modification times of the .shp file and its auxiliary files (i.e.,
+    those with the same name but different extension), and the simplification tolerance.
+
+    Parameters
+    ----------
+    shapefile_path: str
+        A path to the .shp shapefile.
+    simplify_tolerance: Optional[float] = None
+        The tolerance used for simplifying geometries (if any).
+
+    Returns
+    -------
+    shapefile_key: str
+        The hexadecimal key of the shapefile.
+    """
+
+    shapefile_path = os.path.abspath(shapefile_path)
+    shapefile_folder = os.path.dirname(shapefile_path)
+    shapefile_stem = os.path.splitext(os.path.basename(shapefile_path))[0]
+    mtimes = {filename: os.stat(os.path.join(shapefile_folder, filename)).st_mtime_ns
+        for filename in sorted(os.listdir(shapefile_folder))
+        if os.path.splitext(filename)[0] == shapefile_stem}
+    key_string = json.dumps([shapefile_path, mtimes, GEO_CRS, simplify_tolerance])
+
+    return hashlib.sha256(key_string.encode("utf-8")).hexdigest()
+
+
+def simplify_geometries(
+    gdf: gpd.GeoDataFrame,
+    simplify_tolerance: float,
+) -> gpd.GeoDataFrame:
+    """
+    A function that simplifies the geometries of a geodataframe while preserving topology.
+    If all geometries are polygons, they are simplified as a coverage, i.e., borders shared
+    by adjacent areas are simplified in the same way (no gaps or overlaps are introduced).
+    Otherwise, each geometry is simplified on its own.
+
+    Parameters
+    ----------
+    gdf: gpd.GeoDataFrame
+        The geodataframe storing the geometries.
+    simplify_tolerance: float
+        The maximum distance between original and simplified geometries (in the units of
+        the coordinate reference system, i.e., degrees).
+
+    Returns
+    -------
+    gdf: gpd.GeoDataFrame
+        A copy of the geodataframe storing the simplified geometries.
+    """
+
+    gdf = gdf.copy()
+    is_polygonal = gdf.geom_type.isin(["Polygon", "MultiPolygon"]).all()
+    if is_polygonal and hasattr(shapely, "coverage_simplify"):
+        gdf["geometry"] = shapely.coverage_simplify(gdf.geometry.values, simplify_tolerance)
+    else:
+        gdf["geometry"] = gdf.geometry.simplify(simplify_tolerance, preserve_topology=True)
+
+    return gdf
+
+
+def load_shapefile(
+    shapefile_path: str,
+    simplify_tolerance: Optional[float] = None,
+    cache_dir: Optional[str] = None,
+) -> gpd.GeoDataFrame:
+    """
+    A function that loads a shapefile, transforms its geometries to a standard coordinate
+    reference system (GEO_CRS), and optionally simplifies them. Loaded shapefiles are kept
+    for the lifetime of the process and, if cache_dir is set, stored on disk (in the
+    GeoParquet format), so that they are only loaded again if any of their files changes.
+
+    Parameters
+    ----------
+    shapefile_path: str
+        A path to the .shp shapefile.
+    simplify_tolerance: Optional[float] = None
+        If set, the tolerance used for simplifying geometries (see simplify_geometries()).
+    cache_dir: Optional[str] = None
+        If set, a path to the folder in which loaded shapefiles are stored.
+
+    Returns
+    -------
+    gdf: gpd.GeoDataFrame
+        The geodataframe storing the (transformed) geometries of the shapefile.
+    """
+
+    shapefile_key = get_shapefile_key(shapefile_path, simplify_tolerance)
+
+    with SHAPEFILES_LOCK:
+        if shapefile_key in SHAPEFILES_CACHE:
+            return SHAPEFILES_CACHE[shapefile_key].copy(deep=False)
+
+        # Load the shapefile from the on-disk cache, if it is there
+        gdf = None
+        if cache_dir is not None:
+            cache_path = os.path.join(cache_dir, shapefile_key + SHAPEFILES_CACHE_EXT)
+            if os.path.exists(cache_path):
+                print(f"INFO: Loading the shapefile \"{shapefile_path}\" from the cache...")
+                gdf = gpd.read_parquet(cache_path)
+
+        # Otherwise, load the shapefile and transform geometries
+        if gdf is None:
+            gdf = gpd.read_file(shapefile_path).to_crs(GEO_CRS)
+            if simplify_tolerance is not None:
+                gdf = simplify_geometries(gdf, simplify_tolerance)
+
+            if cache_dir is not None:
+                # Write to a temporary file first, so that concurrent readers never see partial files
+                os.makedirs(cache_dir, exist_ok=True)
+                tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+                gdf.to_parquet(tmp_path)
+                os.replace(tmp_path, cache_path)
+
+        SHAPEFILES_CACHE[shapefile_key] = gdf
+
+    return gdf.copy(deep=False)
+
+
+def get_quantized_rings(
+    geometry: dict,
+    transform: tuple[float, float, float, float],
+) -> list[list[list[tuple[int, int]]]]:
+    """
+    A function that quantizes the coordinates of a (GeoJSON-like) geometry, i.e., maps 
+    them to integers on a grid, removing consecutive duplicate points.
+
+    Parameters
+    ----------
+    geometry: dict
+        The GeoJSON-like mapping of a geometry (i.e., shapely.geometry.mapping()).
+    transform: tuple[float, float, float, float]
+        The quantization transform, i.e., (scale_x, scale_y, translate_x, translate_y).
+
+    Returns
+    -------
+    polygons: list[list[list[tuple[int, int]]]]
+        The quantized geometry as a list of polygons (or lines, or points), each being a 
+        list of rings (or lines, or points), each being a list of (x, y) points.
+    """
+
+    scale_x, scale_y, translate_x, translate_y = transform
+
+    def quantize(coordinates):
+        points = []
+        for x, y, *_ in coordinates:
+            point = (round((x - translate_x) / scale_x), round((y - translate_y) / scale_y))
+            if (len(points) == 0) or (points[-1] != point):
+                points.append(point)
+        return points
+
+    geometry_type, coordinates = geometry["type"], geometry["coordinates"]
+    if geometry_type == "Point":
+        return [[quantize([coordinates])]]
+    if geometry_type in ["MultiPoint", "LineString"]:
+        return [[quantize(coordinates)]]
+    if geometry_type in ["MultiLineString", "Polygon"]:
+        return [[quantize(line) for line in coordinates]]
+    if geometry_type == "MultiPolygon":
+        return [[quantize(ring) for ring in polygon] for polygon in coordinates]
+
+    raise ValueError(f"ERROR. The geometry type \"{geometry_type}\" is not supported.")
+
+
+def get_topology(
+    gdf: gpd.GeoDataFrame,
+    quantization: int = 10000,
+    properties: list[str] = [],
+) -> dict:
+    """
+    A function that encodes the geometries of a geodataframe as a quantized TopoJSON 
+    topology (https://github.com/topojson/topojson-specification). Coordinates are mapped 
+    to a quantization x quantization grid, and the boundaries of polygons and lines are 
+    split into arcs at the points in which they meet other boundaries: arcs shared by 
+    adjacent areas (e.g., a border) are thus stored only once, and delta-encoded.
+
+    Parameters
+    ----------
+    gdf: gpd.GeoDataFrame
+        The geodataframe storing the geometries.
+    quantization: int = 10000
+        The number of distinct values for each coordinate.
+    properties: list[str] = []
+        The columns of the geodataframe to be stored as properties of the geometries.
+
+    Returns
+    -------
+    topology: dict
+        The TopoJSON topology, whose geometries are stored in the TOPOLOGY_OBJECT_NAME object.
+    """
+
+    # Get the quantization transform
+    min_x, min_y, max_x, max_y = [float(bound) for bound in gdf.total_bounds]
+    scale_x = (max_x - min_x) / (quantization - 1) if max_x > min_x else 1.0
+    scale_y = (max_y - min_y) / (quantization - 1) if max_y > min_y else 1.0
+    transform = (scale_x, scale_y, min_x, min_y)
+
+    # Quantize the geometries and drop rings which collapse to less than 3 distinct points
+    geometries = []
+    for geometry in gdf.geometry:
+        if (geometry is None) or geometry.is_empty:
+            geometries.append((None, []))
+            continue
+        geometry_type = geometry.geom_type
+        parts = get_quantized_rings(shapely.geometry.mapping(geometry), transform)
+        if geometry_type in ["Polygon", "MultiPolygon"]:
+            parts = [[ring for ring in polygon if len(ring) >= 4] for polygon in parts 
+                if len(polygon[0]) >= 4]
+            if len(parts) == 0:
+                geometries.append((None, []))
+                continue
+        geometries.append((geometry_type, parts))
+
+    # Get all the rings and lines, as lists of points
+    rings, lines = [], []
+    for geometry_type, parts in geometries:
+        if geometry_type in ["Polygon", "MultiPolygon"]:
+            rings.extend(ring[:-1] for polygon in parts for ring in polygon)
+        elif geometry_type in ["LineString", "MultiLineString"]:
+            lines.extend(line for line in parts[0] if len(line) >= 2)
+
+    # Find the junctions, i.e., points in which boundaries meet with different neighbors
+    junctions = set()
+    neighbors = dict()
+    def add_neighbors(point, previous_point, next_point):
+        if point in junctions:
+            return
+        seen_neighbors = neighbors.setdefault(point, (previous_point, next_point))
+        if (seen_neighbors != (previous_point, next_point)) and (
+            seen_neighbors != (next_point, previous_point)):
+            junctions.add(point)
+    for line in lines:
+        junctions.update([line[0], line[-1]])
+        for i in range(1, len(line) - 1):
+            add_neighbors(line[i], line[i - 1], line[i + 1])
+    for ring in rings:
+        for i in range(len(ring)):
+            add_neighbors(ring[i], ring[i - 1], ring[(i + 1) % len(ring)])
+
+    # Store each arc once (identified by its points), referencing reversed arcs with ~index
+    arcs, arcs_index = [], dict()
+    def get_arc_index(arc):
+        arc = tuple(arc)
+        if arc in arcs_index:
+            return arcs_index[arc]
+        if arc[::-1] in arcs_index:
+            return ~arcs_index[arc[::-1]]
+        arcs_index[arc] = len(arcs)
+        arcs.append(arc)
+        return arcs_index[arc]
+
+    def cut(points, is_ring):
+        if is_ring:
+            # Rotate rings to start from a junction (or from their minimum point, if they
+            # have no junctions, so that identical rings are stored as the same arc)
+            starts = [i for i, point in enumerate(points) if point in junctions]
+            start = starts[0] if len(starts) > 0 else points.index(min(points))
+            points = points[start:] + points[:start] + [points[start]]
+        arc_indexes, arc = [], [points[0]]
+        for point in points[1:]:
+            arc.append(point)
+            if point in junctions:
+                arc_indexes.append(get_arc_index(arc))
+                arc = [point]
+        if len(arc) > 1:
+            arc_indexes.append(get_arc_index(arc))
+        return arc_indexes
+
+    # Sanitize properties (e.g., numpy types and missing values) so that they can be serialized
+    if len(properties) > 0:
+        properties_values = gdf[properties].astype(object)
+        properties_values = properties_values.where(properties_values.notna(), None)
+        properties_values = [{property_name: (value.item() if hasattr(value, "item") else value)
+            for property_name, value in row.items()} for _, row in properties_values.iterrows()]
+
+    # Encode the geometries as references to arcs
+    topology_geometries = []
+    for i, (geometry_type, parts) in enumerate(geometries):
+        topology_geometry = {"type": geometry_type}
+        if geometry_type == "Point":
+            topology_geometry["coordinates"] = list(parts[0][0][0])
+        elif geometry_type == "MultiPoint":
+            topology_geometry["coordinates"] = [list(point) for point in parts[0][0]]
+        elif geometry_type == "LineString":
+            topology_geometry["arcs"] = cut(parts[0][0], False)
+        elif geometry_type == "MultiLineString":
+            topology_geometry["arcs"] = [cut(line, False) for line in parts[0] if len(line) >= 2]
+        elif geometry_type == "Polygon":
+            topology_geometry["arcs"] = [cut(ring[:-1], True) for ring in parts[0]]
+        elif geometry_type == "MultiPolygon":
+            topology_geometry["arcs"] = [[cut(ring[:-1], True) for ring in polygon] for polygon in parts]
+        if len(properties) > 0:
+            topology_geometry["properties"] = properties_values[i]
+        topology_geometries.append(topology_geometry)
+
+    # Delta-encode the arcs
+    delta_arcs = []
+    for arc in arcs:
+        delta_arc = [list(arc[0])]
+        for j in range(1, len(arc)):
+            delta_arc.append([arc[j][0] - arc[j - 1][0], arc[j][1] - arc[j - 1][1]])
+        delta_arcs.append(delta_arc)
+
+    topology = {
+        "type": "Topology",
+        "transform": {"scale": [scale_x, scale_y], "translate": [min_x, min_y]},
+        "objects": {TOPOLOGY_OBJECT_NAME: {
+            "type": "GeometryCollection", "geometries": topology_geometries}},
+        "arcs": delta_arcs,
+    }
+
+    return topology
+
+
+def get_shapefile_topology(
+    shapefile_path: str,
+    simplify_tolerance: Optional[float] = None,
+    cache_dir: Optional[str] = None,
+    quantization: int = 10000,
+    properties: list[str] = [],
+) -> dict:
+    """
+    A function that returns the quantized TopoJSON topology (see get_topology()) of the 
+    geometries of a shapefile, loaded using load_shapefile(). Topologies are kept for the 
+    lifetime of the process, so that they are only computed once for all the charts.
+
+    Parameters
+    ----------
+    shapefile_path: str
+        A path to the .shp shapefile.
+    simplify_tolerance: Optional[float] = None
+        If set, the tolerance used for simplifying geometries (see simplify_geometries()).
+    cache_dir: Optional[str] = None
+        If set, a path to the folder in which loaded shapefiles are stored.
+    quantization: int = 10000
+        The number of distinct values for each coordinate.
+    properties: list[str] = []
+        The columns of the shapefile to be stored as properties of the geometries.
+
+    Returns
+    -------
+    topology: dict
+        The TopoJSON topology, whose geometries are stored in the TOPOLOGY_OBJECT_NAME object.
+    """
+
+    topology_key = (get_shapefile_key(shapefile_path, simplify_tolerance), quantization, 
+        tuple(properties))
+    with SHAPEFILES_LOCK:
+        if topology_key in TOPOLOGIES_CACHE:
+            return TOPOLOGIES_CACHE[topology_key]
+
+    gdf = load_shapefile(shapefile_path, simplify_tolerance, cache_dir)
+    topology = get_topology(gdf, quantization, properties)
+    with SHAPEFILES_LOCK:
+        TOPOLOGIES_CACHE[topology_key] = topology
+
+    return topology
+
+
+def get_shapefile_data(
+    shapefile_path: str,
+    simplify_tolerance: Optional[float] = None,
+    cache_dir: Optional[str] = None,
+    quantization: Optional[int] = 10000,
+    properties: list[str] = [],
+) -> Union[alt.InlineData, gpd.GeoDataFrame]:
+    """
+    A function that returns the geometries of a shapefile as data for altair charts. 
+    If quantization is set, geometries are embedded as a quantized TopoJSON topology (see 
+    get_shapefile_topology()), whose features store the given columns in "properties". 
+    Otherwise, the geodataframe is returned and embedded as GeoJSON.
+
+    Parameters
+    ----------
+    shapefile_path: str
+        A path to the .shp shapefile.
+    simplify_tolerance: Optional[float] = None
+        If set, the tolerance used for simplifying geometries (see simplify_geometries()).
+    cache_dir: Optional[str] = None
+        If set, a path to the folder in which loaded shapefiles are stored.
+    quantization: Optional[int] = 10000
+        If set, the number of distinct values for each coordinate of the topology.
+    properties: list[str] = []
+        The columns of the shapefile to be stored as properties of the geometries.
+
+    Returns
+    -------
+    geo_data: Union[alt.InlineData, gpd.GeoDataFrame]
+        The data to be used in altair charts.
+    """
+
+    if quantization is None:
+        return load_shapefile(shapefile_path, simplify_tolerance, cache_dir)
+
+    topology = get_shapefile_topology(shapefile_path, simplify_tolerance, cache_dir, 
+        quantization, properties)
+
+    return alt.InlineData(values=topology, 
+        format=alt.DataFormat(type="topojson", feature=TOPOLOGY_OBJECT_NAME))
@@ -2,6 +2,7 @@ import os
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
 
 from typing import Optional
 
@@ -167,26 +168,30 @@ class PlotlyChart(Chart):
                 print(f"INFO: Saving it to the filepath: \"{output_filepath}\".")
                 self.base_chart.write_html(output_filepath)
 
+            # The figure is validated and serialized (only once) for the static formats
+            if any(output_format in output_formats for output_format in ["pdf", "svg", "png"]):
+                figure_dict = self.base_chart.to_dict()
+
             # Save the chart to a PDF file in the output folder
             if "pdf" in output_formats:
                 # Write the raw data to the output filepath
                 output_filepath = os.path.join(output_folder, chart_name + ".pdf")
                 print(f"INFO: Saving it to the filepath: \"{output_filepath}\".")
-                self.base_chart.write_image(output_filepath)
+                pio.write_image(figure_dict, output_filepath, validate=False)
 
             # Save the chart to a SVG file in the output folder
             if "svg" in output_formats:
                 # Write the raw data to the output filepath
                 output_filepath = os.path.join(output_folder, chart_name + ".svg")
                 print(f"INFO: Saving it to the filepath: \"{output_filepath}\".")
-                self.base_chart.write_image(output_filepath)
+                pio.write_image(figure_dict, output_filepath, validate=False)
 
             # Save the chart to a PNG file in the output folder
             if "png" in output_formats:
                 # Write the raw data to the output filepath
                 output_filepath = os.path.join(output_folder, chart_name + ".png")
                 print(f"INFO: Saving it to the filepath: \"{output_filepath}\".")
-                self.base_chart.write_image(output_filepath)
+                pio.write_image(figure_dict, output_filepath, validate=False)
 
         # Otherwise, raise an error
         else:
@@ -1,16 +1,12 @@
 import altair as alt
-import geopandas as gpd
 import os
 import pandas as pd
 
 from typing import Optional
 
+from variationist.visualization import geo_utils
 from variationist.visualization.altair_chart import AltairChart
 
-# Speed up vector-based spatial data processing
-# See: https://geopandas.org/en/stable/docs/user_guide/io.html#reading-spatial-data
-gpd.options.io_engine = "pyogrio"
-
 
 class ScatterGeoChart(AltairChart):
     """A class for building a ScatterGeoChart object."""
@@ -79,10 +75,14 @@ class ScatterGeoChart(AltairChart):
             raise ValueError(f"ERROR. The filepath for the shapefile \"{self.shapefile_path}\" does not exist.\n")
 
         # Load the shapefile and transform geometries to a standard coordinate reference system
-        gdf = gpd.read_file(self.shapefile_path).to_crs("epsg:4286")
+        # (shapefiles are only loaded once, and their geometries are optionally simplified and
+        # embedded as a quantized topology)
+        geo_data = geo_utils.get_shapefile_data(self.shapefile_path, 
+            extra_args.get("shapefile_tolerance"), extra_args.get("shapefile_cache_dir"), 
+            extra_args.get("shapefile_quantization", 10000))
 
         # Set background chart style
-        background = alt.Chart(gdf).mark_geoshape(
+        background = alt.Chart(geo_data).mark_geoshape(
             stroke="white", strokeWidth=0.5, fill="#e1e7e3")
 
         # Set base chart style
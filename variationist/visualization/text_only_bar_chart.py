@@ -75,6 +75,11 @@ class TextOnlyBarChart(AltairChart):
             header=alt.Header(labelFontWeight="bold"))
         color = alt.Color(color_name, color_type, legend=None) # for aestethics only
 
+        # Embed only the rows which are shown, i.e., the top k ngrams for each group
+        self.df_data = self.filter_top_per_group(
+            self.df_data, x_name, y_name, column_name, self.top_per_class_ngrams)
+        self.base_chart.data = self.df_data
+
         # Set tooltip
         tooltip = [
             alt.Tooltip(y_name, type=y_type, title=self.text_label),
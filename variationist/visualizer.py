@@ -1,15 +1,75 @@
 import altair as alt
+import concurrent.futures
+import copy
+import importlib.util
+import multiprocessing
 import os
 import pandas as pd
+import sys
 from typing import Any, Optional, Union
 
 from variationist import utils
 from variationist.visualization import chart_utils
+from variationist.visualization.bar_chart import BarChart
 from variationist.visualization.diversity_bar_chart import DiversityBarChart
 from variationist.visualization.text_only_bar_chart import TextOnlyBarChart
 from variationist.visualization.stats_bar_chart import StatsBarChart
 
 
+def build_chart(
+    ChartClass: type,
+    chart_name: str,
+    metric: str,
+    df_data: pd.core.frame.DataFrame,
+    metadata: dict[str, Any],
+    extra_args: dict[str, Any],
+    chart_dims: dict[str, Any],
+    args: "VisualizerArgs",
+) -> Any:
+    """
+    A function that builds a chart object and saves it to the output folder (if any). It 
+    is defined at the module level so that charts can be built by worker processes.
+
+    Parameters
+    ----------
+    ChartClass: type
+        The class of the chart to be built.
+    chart_name: str
+        The name of the files storing the saved chart.
+    metric: str
+        The metric associated to the "df_data" dataframe and thus to the chart.
+    df_data: pd.core.frame.DataFrame
+        A long-form dataframe storing the results of a prior analysis for the metric.
+    metadata: dict[str, Any]
+        A dictionary storing the metadata about the prior analysis.
+    extra_args: dict[str, Any]
+        A dictionary storing the extra arguments for the chart type.
+    chart_dims: dict[str, Any]
+        The mapping dictionary for the variables for the given chart.
+    args: VisualizerArgs
+        A VisualizerArgs object containing the arguments for the Visualizer.
+
+    Returns
+    -------
+    base_chart: Any
+        The chart object (e.g., an alt.Chart object).
+    """
+
+    # Create the chart object
+    print(f"INFO: Creating a {chart_name} object for metric \"{metric}\"...")
+    chart = ChartClass(
+        df_data, metric, metadata, extra_args, chart_dims, 
+        args.zoomable, args.top_per_class_ngrams
+    )
+
+    # Save the chart to the output folder
+    if args.output_folder != None:
+        output_filepath = os.path.join(args.output_folder, metric)
+        chart.save(output_filepath, chart_name, args.output_formats)
+
+    return chart.base_chart
+
+
 class VisualizerArgs:
     """A class storing the arguments for the visualization component.
     
@@ -41,7 +101,42 @@ class VisualizerArgs:
             The key field name in the shapefile which contains the names for the areas 
             which should match the possible values for the variable of interest (e.g., 
             if the variable of interest is "state", here should go the name of the
-            variable name encoded in the shapefile containing the possible states)."""
+            variable name encoded in the shapefile containing the possible states).
+        shapefile_tolerance: Optional[float] = None
+            If set, the geometries of the shapefile are simplified so that they are at 
+            most this distance (in degrees) from the original ones, while preserving their
+            topology (e.g., borders shared by adjacent areas). It reduces the size of charts
+            for detailed shapefiles. By default, geometries are not simplified.
+        shapefile_cache_dir: Optional[str] = None
+            A path to a folder in which to store loaded (and possibly simplified) shapefiles,
+            so that they are loaded faster in the next runs. Stored shapefiles are loaded 
+            again if any of their files changes. In any case, a shapefile is only loaded
+            once for all the charts of a run.
+        shapefile_quantization: Optional[int] = 10000
+            The number of distinct values for each coordinate of the shapefile geometries, 
+            which are embedded once in each chart as a quantized TopoJSON topology (in which
+            borders shared by adjacent areas are stored once). Higher values are more precise
+            but lead to larger charts. If None, geometries are embedded as GeoJSON instead.
+        server_side_transforms: Optional[bool] = False
+            Whether the chart transforms (e.g., ranking windows, filters, and lookups) 
+            should be executed in Python using VegaFusion when saving charts, so that only 
+            the data of the rendered marks are embedded in HTML charts and converted to pdf, 
+            svg, or png. It requires the "vegafusion[embed]" package to be installed.
+        external_data: Optional[bool] = False
+            Whether the data of HTML charts should be saved to compact json files in the
+            output folder of each metric and referenced by URL from the charts, rather than
+            embedded in each of them. Charts sharing the same data share the same file.
+            Note that browsers may only load them if the output folder is served over HTTP.
+            This parameter is ignored if server_side_transforms is set.
+        n_jobs: Optional[int] = 1
+            The number of workers used to build and save charts in parallel across metrics
+            and chart types. If set to a value lower than or equal to 0, all the available 
+            CPUs are used. Defaults to 1 (charts are built one after the other).
+        executor: Optional[str] = "threads"
+            The kind of workers used when `n_jobs` is not 1. Available choices are `threads`
+            (default) and `processes`. Processes avoid contention on the Python interpreter
+            lock when building many charts, but they are started anew (i.e., scripts should
+            create charts under `if __name__ == "__main__":`)."""
 
     def __init__(
         self,
@@ -52,6 +147,13 @@ class VisualizerArgs:
         ngrams: Optional[list[str]] = None,
         shapefile_path: Optional[str] = None,
         shapefile_var_name: Optional[str] = None,
+        shapefile_tolerance: Optional[float] = None,
+        shapefile_cache_dir: Optional[str] = None,
+        shapefile_quantization: Optional[int] = 10000,
+        server_side_transforms: Optional[bool] = False,
+        external_data: Optional[bool] = False,
+        n_jobs: Optional[int] = 1,
+        executor: Optional[str] = "threads",
     ) -> None:
         """
         A function that initializes the arguments useful for visualizing charts.
@@ -64,6 +166,18 @@ class VisualizerArgs:
         self.ngrams = ngrams
         self.shapefile_path = shapefile_path
         self.shapefile_var_name = shapefile_var_name
+        self.shapefile_tolerance = shapefile_tolerance
+        self.shapefile_cache_dir = shapefile_cache_dir
+        self.shapefile_quantization = shapefile_quantization
+        self.server_side_transforms = server_side_transforms
+        self.external_data = external_data
+        self.n_jobs = n_jobs
+        self.executor = executor
+
+        if self.executor not in ["threads", "processes"]:
+            sys.exit(f"ERROR: The executor '{self.executor}' is not supported. Available choices are 'threads' and 'processes'.")
+        if (self.shapefile_quantization is not None) and (self.shapefile_quantization < 2):
+            sys.exit(f"ERROR: The shapefile quantization must be at least 2 (or None), but {self.shapefile_quantization} was given.")
 
 
 class Visualizer:
@@ -74,7 +188,9 @@ class Visualizer:
     ----------
         input_json: `str` or `dict`
             A path to the json file or a json/dict object storing metadata and results 
-            from a prior analysis using Variationist.
+            from a prior analysis using Variationist. It can also be a path to a folder
+            storing them as columnar tables (see `Inspector.save_output_to_table()`), or
+            the ready-made long-form dataframes returned by `Inspector.get_long_form_output()`.
         args: VisualizerArgs
             A VisualizerArgs object containing the arguments for the Visualizer"""
 
@@ -97,8 +213,22 @@ class Visualizer:
         self.variable_names = dict()
         self.variable_values = dict()
 
+        # A folder stores metadata and per-metric results as columnar tables
+        is_table_folder = isinstance(input_json, str) and os.path.isdir(input_json)
+
+        # The output of Inspector.get_long_form_output() stores ready-made dataframes
+        is_long_form = isinstance(input_json, dict) and (utils.LONG_FORM_KEY in input_json)
+
         # Load the json object storing metadata and results
-        json_data = utils.load_json_data_from_filepath_or_dict(input_json)
+        if is_table_folder:
+            json_data = utils.load_json_data_from_filepath_or_dict(
+                os.path.join(input_json, utils.RESULTS_METADATA_FILENAME))
+            json_data = {"metadata": json_data}
+        elif is_long_form:
+            # Metadata are modified below, so the ones of the Inspector are left untouched
+            json_data = {"metadata": copy.deepcopy(input_json["metadata"])}
+        else:
+            json_data = utils.load_json_data_from_filepath_or_dict(input_json)
 
         # Get the metadata and variable names from the json
         self.metadata = json_data["metadata"]
@@ -114,32 +244,94 @@ class Visualizer:
             else:
                 self.variable_names = ["text_name::"]
 
-        # Get per-metric long-form dataframes from the json
-        for metric in self.metadata["metrics"]:
-            # Store the concatenated string useful for multiple variables
+        # Keep the source of the results: per-metric long-form dataframes are only built when
+        # the charts for a metric are requested (see get_metric_df())
+        self.input_json = input_json
+        self.json_data = json_data
+        self.is_table_folder = is_table_folder
+        self.is_long_form = is_long_form
+
+        # Retrieve the possible values for the variable (combination) from the json
+        if not (is_table_folder or is_long_form):
             var_names_concat = utils.MULTI_VAR_SEP.join(self.variable_names)
+            for metric in self.metadata["metrics"]:
+                if metric == "stats":
+                    self.variable_values[metric] = list(
+                        json_data["metrics"][metric]["num_texts"][var_names_concat].keys())
+                else:
+                    self.variable_values[metric] = list(
+                        json_data["metrics"][metric][var_names_concat].keys())
 
-            if metric == "stats":
-                # Retrieve the possible values for the variable (combination) and the given metric
-                self.variable_values[metric] = list(
-                    json_data["metrics"][metric]["num_texts"][var_names_concat].keys())
 
-                # Get the long-form dataframe
-                self.df_metric_data[metric] = self.get_stats_df_from_json(
-                    json_data = json_data["metrics"][metric], 
+    def get_metric_df(
+        self,
+        metric: str,
+        top_per_class_ngrams: Optional[int] = None,
+    ) -> pd.core.frame.DataFrame:
+        """
+        A function that returns the long-form dataframe for a metric, building it on first 
+        use from the json, tables, or ready-made dataframes the visualizer was initialized 
+        with. Complete dataframes are stored in `df_metric_data`. If top_per_class_ngrams is 
+        set, only the highest scoring n-grams for each variable value(s) are kept (including 
+        ties), and they are selected before building the dataframe from the json.
+
+        Parameters
+        ----------
+        metric: str
+            The metric whose long-form dataframe is requested.
+        top_per_class_ngrams: int, *optional*, defaults to `None`
+            The number of highest scoring n-grams to keep for each variable value(s).
+
+        Returns
+        -------
+        df_data: pd.core.frame.DataFrame
+            A long-form dataframe storing the results of a prior analysis for the metric.
+        """
+
+        focus_ngrams = None if metric == "stats" else self.args.ngrams
+
+        if metric not in self.df_metric_data:
+            # Store the concatenated string useful for multiple variables
+            var_names_concat = utils.MULTI_VAR_SEP.join(self.variable_names)
+
+            if self.is_table_folder:
+                # Read the long-form dataframe natively (only the n-grams of interest, if any)
+                df_data = self.get_df_from_table(
+                    input_folder = self.input_json,
+                    metric = metric,
+                    focus_ngrams = focus_ngrams)
+
+            elif self.is_long_form:
+                # Take the ready-made long-form dataframe (a shallow copy, as charts may add columns)
+                df_data = self.input_json[utils.LONG_FORM_KEY][metric]
+                if focus_ngrams != None:
+                    df_data = df_data[df_data["ngram"].isin(focus_ngrams)].reset_index(drop=True)
+                df_data = df_data.copy(deep=False)
+
+            elif metric == "stats":
+                df_data = self.get_stats_df_from_json(
+                    json_data = self.json_data["metrics"][metric], 
                     var_names_concat = var_names_concat)
 
             else:
-                # Retrieve the possible values for the variable (combination) and the given metric
-                self.variable_values[metric] = list(
-                    json_data["metrics"][metric][var_names_concat].keys())
-
-                # Get the long-form dataframe
-                self.df_metric_data[metric] = self.get_df_from_json(
-                    json_data = json_data["metrics"][metric], 
+                # Build only the dataframe for the highest scoring n-grams, if requested
+                df_data = self.get_df_from_json(
+                    json_data = self.json_data["metrics"][metric], 
                     var_names_concat = var_names_concat,
-                    top_per_class_ngrams = self.args.top_per_class_ngrams,
-                    focus_ngrams = self.args.ngrams)
+                    top_per_class_ngrams = top_per_class_ngrams,
+                    focus_ngrams = focus_ngrams)
+                if top_per_class_ngrams != None:
+                    return df_data
+
+            self.df_metric_data[metric] = df_data
+            if metric not in self.variable_values:
+                self.variable_values[metric] = self.get_variable_values_from_df(df_data, metric)
+
+        df_data = self.df_metric_data[metric]
+        if (top_per_class_ngrams != None) and (metric != "stats"):
+            df_data = utils.get_top_per_class_df(df_data, top_per_class_ngrams)
+
+        return df_data
 
 
     def get_df_from_json(
@@ -165,11 +357,9 @@ class Visualizer:
             A string denoting the ordered concatenation of variable names (i.e., 
             original column names), separated by utils.MULTI_VAR_SEP, to be used for 
             giving meaningful names to the long-form dataframe.
-        top_per_class_ngrams: int = 20
-            The maximum number of highest scoring per-class n-grams to show (for bar
-            charts only). If set to None, it will show all the n-grams in the corpus 
-            (it may easily be overwhelming). By default is 20 to keep the visualization 
-            compact.
+        top_per_class_ngrams: int
+            The maximum number of highest scoring per-class n-grams to keep (including
+            ties). If set to None, it will keep all the n-grams in the corpus.
         fucus_ngrams: list[str], *optional*, defaults to `None`
             A list of n-grams of interest to focus the filtering on. N-grams should 
             match the number of tokens used in the prior computation (e.g., if 
@@ -181,32 +371,69 @@ class Visualizer:
             A long-form dataframe storing the results of a prior analysis.
         """
 
-        # Initialize the lists for variables, ngrams, and values
-        variables, ngrams, values = dict(), [], []
+        return utils.get_long_form_df(json_data, var_names_concat, focus_ngrams, top_per_class_ngrams)
 
-        # Get the individual variables and initialize each of them
-        var_names = var_names_concat.split(utils.MULTI_VAR_SEP)
-        for var_name in var_names:
-            variables[var_name] = []
 
-        # Iterate through variable values and ngram-value pairs and keep those of interest
-        for variable, raw_items in json_data[var_names_concat].items():
-            for ngram, value in raw_items.items():
-                if (focus_ngrams != None) and (ngram not in focus_ngrams):
-                    continue
-                else:
-                    for i in range(len(var_names)):
-                        variables[var_names[i]].append(str(variable).split(utils.MULTI_VAR_SEP)[i])
-                    ngrams.append(ngram)
-                    values.append(value)
-
-        # Create the long-form dataframe
-        dict_data = variables
-        dict_data["ngram"] = ngrams
-        dict_data["value"] = values
-        df_data = pd.DataFrame(dict_data)
-        
-        return df_data
+    def get_variable_values_from_df(
+        self,
+        df_data: pd.core.frame.DataFrame,
+        metric: str,
+    ) -> list[str]:
+        """
+        A function that returns the possible values for the variable (combination) in a 
+        long-form dataframe, concatenated by utils.MULTI_VAR_SEP as in the json output.
+
+        Parameters
+        ----------
+        df_data: pd.core.frame.DataFrame
+            A long-form dataframe storing the results of a prior analysis.
+        metric: str
+            The metric associated to the "df_data" dataframe.
+
+        Returns
+        -------
+        variable_values: list[str]
+            The list of (concatenated) variable values, in order of appearance.
+        """
+
+        var_columns = df_data.columns[:-3 if metric == "stats" else -2]
+        return list(dict.fromkeys(utils.MULTI_VAR_SEP.join(values)
+            for values in zip(*[df_data[var_column] for var_column in var_columns])))
+
+
+    def get_df_from_table(
+        self,
+        input_folder: str,
+        metric: str,
+        focus_ngrams: Optional[list[str]] = None,
+    ) -> pd.core.frame.DataFrame:
+        """
+        A function that returns a long-form dataframe from the columnar table (Parquet or 
+        Arrow IPC) storing the results of a metric from a prior analysis using Variationist 
+        (see `Inspector.save_output_to_table()`). Optionally, it takes a list of n-grams to 
+        focus the filtering on, in which case only the rows of interest are read.
+
+        Parameters
+        ----------
+        input_folder: str
+            A path to the folder storing the metadata and the per-metric tables.
+        metric: str
+            The name of the metric whose table should be read.
+        focus_ngrams: list[str], *optional*, defaults to `None`
+            A list of n-grams of interest to focus the filtering on.
+
+        Returns
+        -------
+        df_data: pd.core.frame.DataFrame
+            A long-form dataframe storing the results of a prior analysis.
+        """
+
+        for table_ext in utils.TABLE_FORMATS_EXTENSIONS.values():
+            table_path = os.path.join(input_folder, f"{metric}{table_ext}")
+            if os.path.isfile(table_path):
+                return utils.load_long_form_df(table_path, focus_ngrams)
+
+        raise FileNotFoundError(f"ERROR: No table found for the metric \"{metric}\" in \"{input_folder}\".")
 
 
     def get_stats_df_from_json(
@@ -239,38 +466,7 @@ class Visualizer:
             A long-form dataframe storing the results of a prior analysis.
         """
 
-        # Initialize the lists for variables, submetrics, and values
-        variables, submetric_list, val_1_list, val_2_list = dict(), [], [], []
-
-        # Get the individual variables and initialize each of them
-        var_names = var_names_concat.split(utils.MULTI_VAR_SEP)
-        for var_name in var_names:
-            variables[var_name] = []
-
-        # Iterate through the dictionary to create lists for creating the dataframe
-        for submetric, vars_label_vals in json_data.items():
-            for raw_vars, label_vals in vars_label_vals.items():
-                for label, vals in label_vals.items():
-                    is_vals_dict = (type(vals)==dict)
-                    if is_vals_dict:
-                        val_1, val_2 = vals["mean"], vals["stdev"]
-                    else:
-                        val_1, val_2 = vals, None
-
-                    for i in range(len(var_names)):
-                        variables[var_names[i]].append(str(label).split(utils.MULTI_VAR_SEP)[i])
-                    submetric_list.append(submetric)
-                    val_1_list.append(val_1)
-                    val_2_list.append(val_2)
-
-        # Create the long-form dataframe
-        dict_data = variables
-        dict_data["statistics"] = submetric_list
-        dict_data["val_1"] = val_1_list
-        dict_data["val_2"] = val_2_list
-        df_data = pd.DataFrame(dict_data)
-
-        return df_data
+        return utils.get_stats_long_form_df(json_data, var_names_concat)
 
 
     def get_charts_metadata(
@@ -379,62 +575,52 @@ class Visualizer:
             extra_args["shapefile_path"] = self.args.shapefile_path
         if self.args.shapefile_var_name != None:
             extra_args["shapefile_var_name"] = self.args.shapefile_var_name
+        if self.args.shapefile_tolerance != None:
+            extra_args["shapefile_tolerance"] = self.args.shapefile_tolerance
+        if self.args.shapefile_cache_dir != None:
+            extra_args["shapefile_cache_dir"] = self.args.shapefile_cache_dir
+        extra_args["shapefile_quantization"] = self.args.shapefile_quantization
+        if self.args.server_side_transforms == True:
+            if importlib.util.find_spec("vegafusion") is None:
+                print("WARNING: The \"vegafusion\" package is not installed, thus chart transforms "
+                    "will be executed client-side. Please install \"vegafusion[embed]\" to use them.")
+            else:
+                extra_args["server_side_transforms"] = True
+        if self.args.external_data == True:
+            extra_args["external_data"] = True
 
-        # Build chart objects for each computed metric based on variable types and
-        # semantics, then save them to the user-specified output folder
-        for metric, df_data in self.df_metric_data.items():
+        # Define the chart objects to build for each computed metric based on variable types 
+        # and semantics, i.e., tuples of (metric, key, chart class, name, data, dimensions)
+        chart_jobs = []
+        for metric in self.metadata["metrics"]:
             charts[metric] = dict()
 
             if metric == "stats":
-                # Create the chart object
-                print(f"INFO: Creating a BarChart object for metric \"{metric}\"...")
-                chart = StatsBarChart(
-                    df_data, metric, self.metadata, extra_args, {}, 
-                    self.args.zoomable, self.args.top_per_class_ngrams
-                )
-
-                # Save the chart to the output folder
-                if self.args.output_folder != None:
-                    output_filepath = os.path.join(self.args.output_folder, metric)
-                    chart.save(output_filepath, "StatsBarChart", self.args.output_formats)
+                df_data = self.get_metric_df(metric)
 
-                # Add the chart to the dictionary of metric-associated charts
-                charts[metric]["BarChart"] = chart.base_chart
+                # Add the chart to the list of charts to be built
+                chart_jobs.append((metric, "BarChart", StatsBarChart, "StatsBarChart", df_data, {}))
 
             elif metric in ["ttr", "root_ttr", "log_ttr", "maas"]:
-                # Create the chart object
-                print(f"INFO: Creating a BarChart object for metric \"{metric}\"...")
-                chart = DiversityBarChart(
-                    df_data, metric, self.metadata, extra_args, {}, 
-                    self.args.zoomable, self.args.top_per_class_ngrams
-                )
+                df_data = self.get_metric_df(metric)
 
-                # Save the chart to the output folder
-                if self.args.output_folder != None:
-                    output_filepath = os.path.join(self.args.output_folder, metric)
-                    chart.save(output_filepath, "DiversityBarChart", self.args.output_formats)
-
-                # Add the chart to the dictionary of metric-associated charts
-                charts[metric]["BarChart"] = chart.base_chart
+                # Add the chart to the list of charts to be built
+                chart_jobs.append((metric, "BarChart", DiversityBarChart, "DiversityBarChart", df_data, {}))
 
             else:
                 # Get dictionary containing information on which and how to create charts
                 charts_metadata = self.get_charts_metadata(metric)
 
+                # Bar charts only show the highest scoring n-grams for each class, so if no other
+                # charts are created, only those are kept (charts filter the same n-grams anyway)
+                if (len(self.metadata["var_types"]) == 0) or (set(charts_metadata.keys()) <= {BarChart}):
+                    df_data = self.get_metric_df(metric, self.args.top_per_class_ngrams)
+                else:
+                    df_data = self.get_metric_df(metric)
+
                 if len(self.metadata["var_types"]) == 0:
-                    print(f"INFO: Creating a BarChart object for metric \"{metric}\"...")
-                    chart = TextOnlyBarChart(
-                        df_data, metric, self.metadata, extra_args, {}, 
-                        self.args.zoomable, self.args.top_per_class_ngrams
-                    )
-                            
-                    # Save the chart to the output folder
-                    if self.args.output_folder != None:
-                        output_filepath = os.path.join(self.args.output_folder, metric)
-                        chart.save(output_filepath, "BarChart", self.args.output_formats)
-
-                        # Add the chart to the dictionary of metric-associated charts
-                        charts[metric]["BarChart"] = chart.base_chart
+                    # Add the chart to the list of charts to be built
+                    chart_jobs.append((metric, "BarChart", TextOnlyBarChart, "BarChart", df_data, {}))
                 else:
                     # Iterate over the results and create and save charts based on these information
                     charts_count = 0
@@ -444,24 +630,37 @@ class Visualizer:
 
                         # Create only the subset of charts based on bins definition
                         if (chart_info["for_bins"] == "any") or (no_bins and (chart_info["for_bins"] == False)) or ((no_bins == False) and (chart_info["for_bins"] == True)):
-                            # Create the chart object
-                            print(f"INFO: Creating a {ChartClass.__name__} object for metric \"{metric}\"...")
-                            chart = ChartClass(
-                                df_data, metric, self.metadata, extra_args, chart_info, 
-                                self.args.zoomable, self.args.top_per_class_ngrams
-                            )
-                            
-                            # Save the chart to the output folder
-                            if self.args.output_folder != None:
-                                output_filepath = os.path.join(self.args.output_folder, metric)
-                                chart.save(output_filepath, ChartClass.__name__, self.args.output_formats)
-
-                            # Add the chart to the dictionary of metric-associated charts
-                            charts[metric][ChartClass.__name__] = chart.base_chart
+                            # Add the chart to the list of charts to be built
+                            chart_jobs.append((metric, ChartClass.__name__, ChartClass, 
+                                ChartClass.__name__, df_data, chart_info))
 
                             charts_count += 1
 
                     if charts_count == 0:
                         print(f"No visualization is currently supported for the association metric(s) defined, but you can find the results in the output .json file.")
 
+        # Build the chart objects and save them to the user-specified output folder, using a
+        # pool of workers across metrics and chart types if requested
+        n_workers = min(utils.get_num_workers(self.args.n_jobs), len(chart_jobs))
+        build_args = [(ChartClass, chart_name, metric, df_data.copy(deep=False), self.metadata, 
+            extra_args, chart_dims, self.args) for (metric, _, ChartClass, chart_name, df_data, 
+            chart_dims) in chart_jobs]
+        if n_workers > 1:
+            print(f"INFO: Creating {len(chart_jobs)} charts in parallel using {n_workers} {self.args.executor}.")
+            if self.args.executor == "processes":
+                # Workers are spawned, as forking after chart exporters started threads may hang
+                executor = concurrent.futures.ProcessPoolExecutor(max_workers=n_workers, 
+                    mp_context=multiprocessing.get_context("spawn"))
+            else:
+                executor = concurrent.futures.ThreadPoolExecutor(max_workers=n_workers)
+            with executor:
+                futures = [executor.submit(build_chart, *args) for args in build_args]
+                base_charts = [future.result() for future in futures]
+        else:
+            base_charts = [build_chart(*args) for args in build_args]
+
+        # Add the charts to the dictionary of metric-associated charts
+        for (metric, chart_key, _, _, _, _), base_chart in zip(chart_jobs, base_charts):
+            charts[metric][chart_key] = base_chart
+
         return charts